@@ -1,5 +1,6 @@
+from functools import partial
 from pathlib import Path
-from statistics import get_log_files
+from statistics import get_log_files, map_log_files
 
 import numpy as np
 from tqdm import tqdm
@@ -9,33 +10,47 @@ from environments.spe_ed import SavedGame
 from state_representation import windowed_abstraction
 
 
-def create_sequences(log_dir, date, radius=5):
+def _log_sequences(log_file, radius):
+    """Compute the state/action sequences of all players in a log file.
+
+    Returns:
+        List of `(name, windows, actions)`
+    """
+    game = SavedGame.load(log_file)
+    sequences = []
+    for player_id in game.player_ids:
+        # Compute abstraction window
+        windows = windowed_abstraction(game, player_id, radius=radius)
+
+        # Infer actions
+        actions = [
+            spe_ed.actions.index(a) if a in spe_ed.actions else None
+            for a in (
+                spe_ed.infer_action(game.player_states[t][player_id - 1], game.player_states[t + 1][player_id - 1])
+                for t in range(len(windows))
+            )
+        ]
+        if any(a is None for a in actions):
+            continue  # Skip sequences with illegal actions
+
+        sequences.append((f"{log_file.stem}_{player_id}", windows, actions))
+    return sequences
+
+
+def create_sequences(log_dir, date, radius=5, cores=None):
     "Create a state/action sequences .npz file."
     names = []
     data = {"names": names}
-    for log_file in tqdm(get_log_files(log_dir, prefix=date)):
-        game = SavedGame.load(log_file)
-        for player_id in game.player_ids:
-            # Compute abstraction window
-            windows = windowed_abstraction(game, player_id, radius=radius)
-
-            # Infer actions
-            actions = [
-                spe_ed.actions.index(a) if a in spe_ed.actions else None
-                for a in (
-                    spe_ed.infer_action(game.player_states[t][player_id - 1], game.player_states[t + 1][player_id - 1])
-                    for t in range(len(windows))
-                )
-            ]
-            if any(a is None for a in actions):
-                continue  # Skip sequences with illegal actions
-
-            name = f"{log_file.name[:-5]}_{player_id}"
+    log_files = sorted(get_log_files(log_dir, prefix=date))  # Deterministic order of the sequences
+    for sequences in map_log_files(partial(_log_sequences, radius=radius), log_files, cores, chunksize=1):
+        for name, windows, actions in sequences:
             names.append(name)
             data[f"{name}-state"] = windows
             data[f"{name}-action"] = actions
 
-    np.savez_compressed(Path(log_dir).parent / "sequences" / date, **data)
+    sequence_dir = Path(log_dir).parent / "sequences"
+    sequence_dir.mkdir(exist_ok=True)
+    np.savez_compressed(sequence_dir / date, **data)
 
 
 def load_sequence_file(sequence_file):
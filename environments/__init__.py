@@ -1,10 +1,14 @@
+from environments.batch import PlayerBatch
+from environments.bitboard import BitboardSimulator
 from environments.simulator import SimulatedSpe_edEnv, Spe_edSimulator
 from environments.spe_ed import Player
 from environments.spe_ed_env import Spe_edEnv
 from environments.websocketenv import WebsocketEnv
 
 __all__ = [
+    "BitboardSimulator",
     "Player",
+    "PlayerBatch",
     "Spe_edEnv",
     "SimulatedSpe_edEnv",
     "Spe_edSimulator",
@@ -0,0 +1,118 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from environments.spe_ed import Player, direction_offsets, directions, max_speed, transitions
+
+_offsets = np.array(direction_offsets)
+_transitions = np.array(transitions)  # `environments.spe_ed.transitions` as array of shape (4, max_speed + 1, 5, 3)
+
+
+@dataclass
+class PlayerBatch:
+    """Structure of arrays for the states of many players.
+
+    Each entry is an independent branch, i.e. players of different entries do not interact with each other.
+    """
+
+    x: np.ndarray
+    y: np.ndarray
+    direction: np.ndarray  # Direction index
+    speed: np.ndarray
+    active: np.ndarray
+
+    @classmethod
+    def from_players(cls, players):
+        """Create a batch from a list of `Player` objects."""
+        return cls(
+            x=np.array([p.x for p in players], dtype=int),
+            y=np.array([p.y for p in players], dtype=int),
+            direction=np.array([p.direction_index for p in players], dtype=int),
+            speed=np.array([p.speed for p in players], dtype=int),
+            active=np.array([p.active for p in players], dtype=bool),
+        )
+
+    def player(self, i, player_id=1):
+        """Get entry `i` as `Player` object."""
+        return Player(
+            player_id,
+            int(self.x[i]),
+            int(self.y[i]),
+            directions[self.direction[i]],
+            int(self.speed[i]),
+            bool(self.active[i]),
+        )
+
+    def take(self, indices):
+        """Select entries by index array."""
+        return PlayerBatch(
+            self.x[indices], self.y[indices], self.direction[indices], self.speed[indices], self.active[indices]
+        )
+
+    def repeat(self, n):
+        """Repeat each entry `n` times, e.g. to expand each branch by all actions."""
+        return self.take(np.repeat(np.arange(len(self)), n))
+
+    def __len__(self):
+        return len(self.x)
+
+
+def simulate_batch(cells, states, action_indices, rounds, occupied=None):
+    """Perform one game step of Spe_ed for many independent branches at once.
+
+    Follows the same rules as `environments.simulator.simulate` for each branch with a single player.
+
+    Args:
+        cells: Shared board of all branches, is not modified
+        states: `PlayerBatch` with `N` entries
+        action_indices: Action of each branch as index in `environments.spe_ed.actions`
+        rounds: Number of this round, either shared or one per branch
+        occupied: Optional `(N, K)` array of flat cell indices occupied by each branch in previous steps, `-1` pads
+    Returns:
+        Tuple of the new `PlayerBatch` and an `(N, max_speed)` array of the flat indices of all cells touched in this
+        step, `-1` pads.
+    """
+    height, width = cells.shape
+    action_indices = np.asarray(action_indices)
+
+    # Perform actions
+    # Speed of inactive players may be out of range, their state is kept anyway
+    next_direction, next_speed, alive = np.moveaxis(
+        _transitions[states.direction, np.clip(states.speed, 0, max_speed), action_indices], -1, 0
+    )
+    direction = np.where(states.active, next_direction, states.direction)
+    speed = np.where(states.active, next_speed, states.speed)
+    active = states.active & (alive != 0)
+
+    # Positions of all steps, shape (N, max_speed)
+    steps = np.arange(1, max_speed + 1)
+    offsets = _offsets[direction]
+    x = states.x[:, None] + offsets[:, 0, None] * steps
+    y = states.y[:, None] + offsets[:, 1, None] * steps
+    valid = active[:, None] & (steps <= speed[:, None])
+    inside = (x >= 0) & (y >= 0) & (x < width) & (y < height)
+    n_inside = np.sum(valid & inside, axis=1)  # Positions are on a line, thus leaving the bounds is final
+
+    # Check for jumps
+    jump = np.reshape(np.asarray(rounds) % 6 == 0, (-1, 1))
+    jumped = jump & (steps > 1) & (steps < speed[:, None])
+
+    touched = valid & inside & ~jumped
+    path = np.where(touched, np.clip(y, 0, height - 1) * width + np.clip(x, 0, width - 1), -1)
+
+    # Collisions with the board or with cells occupied in previous steps of the branch
+    collisions = touched & (cells.reshape(-1)[np.maximum(path, 0)] != 0)
+    if occupied is not None and occupied.shape[1] > 0:
+        collisions |= touched & np.any(path[:, :, None] == occupied[:, None, :], axis=2)
+
+    # Players, which left the bounds, end on the first cell outside the bounds
+    left_bounds = n_inside < np.where(active, speed, 0)
+    distance = np.where(left_bounds, n_inside + 1, np.where(active, speed, 0))
+    new_states = PlayerBatch(
+        x=states.x + offsets[:, 0] * distance,
+        y=states.y + offsets[:, 1] * distance,
+        direction=direction,
+        speed=speed,
+        active=active & ~left_bounds & ~np.any(collisions, axis=1),
+    )
+    return new_states, path
@@ -0,0 +1,193 @@
+from functools import lru_cache
+
+import numpy as np
+
+from environments import zobrist
+from environments.spe_ed import direction_offsets
+
+
+def to_bits(mask):
+    """Pack a boolean ndarray into a python int.
+
+    Bit `y * width + x` represents cell `(x, y)`.
+    """
+    return int.from_bytes(np.packbits(np.ravel(mask), bitorder="little").tobytes(), "little")
+
+
+def from_bits(bits, size):
+    """Unpack a python int into a flat boolean ndarray of length `size`."""
+    data = np.frombuffer(bits.to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(data, count=size, bitorder="little").view(bool)
+
+
+def bit_indices(bits):
+    """Yield the indices of all set bits in ascending order."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+@lru_cache(maxsize=None)
+def _line_mask(stride, n_steps, speed, jump, reverse):
+    """Bitmask of the cells touched by the first `n_steps` steps of a move.
+
+    The bit of the cell with the lowest index is at position 0.
+
+    Args:
+        stride: Absolute distance of two successive cells in bits
+        n_steps: Number of steps to include
+        speed: Speed of the move, required to evaluate the jump rule
+        jump: Whether the move is a jump
+        reverse: Whether the move goes towards lower indices (left or up)
+    """
+    mask = 0
+    for i in range(n_steps):
+        if jump and 0 < i < speed - 1:  # Jumped cells are not touched
+            continue
+        mask |= 1 << ((n_steps - 1 - i if reverse else i) * stride)
+    return mask
+
+
+class BitboardSimulator:
+    """Alternative state for the simulate function, stores occupancy as bitboard.
+
+    Provides the same interface as `Spe_edSimulator`, but cells are packed into python ints and players are moved
+    with shift/mask operations. The cell array is only computed on access of `cells`, thus searches which only need
+    the players are much faster.
+
+    Keeps a history.
+    """
+
+    def __init__(self, cells, players, rounds, changed=[], parent=None):
+        self.players = players
+        self.rounds = rounds
+        self._changed = changed
+        self.parent = parent
+
+        self._base = cells
+        self._cells = cells
+        self._height, self._width = cells.shape
+        self._occupied = to_bits(cells != 0)
+        self._board_hash = zobrist.board_hash(cells)
+        self._owners = {}  # Cells written by each player since base state
+        self._crashed = 0  # Cells with collisions since base state
+
+    def step(self, actions):
+        """Perform one simulation step"""
+        sim = BitboardSimulator.__new__(BitboardSimulator)
+        sim._base = self._base
+        sim._cells = None
+        sim._height = self._height
+        sim._width = self._width
+        sim.players = [p.copy() for p in self.players]
+        sim.parent = self
+        sim._changed = None
+        sim._occupied, sim._owners, sim._crashed, sim._newly_occupied = self._simulate(sim.players, actions)
+        sim.rounds = self.rounds + 1
+
+        # Update hash incrementally by the newly occupied cells
+        sim._board_hash = self._board_hash
+        keys = zobrist.cell_key_list(self._height, self._width)
+        for i in bit_indices(sim._newly_occupied):
+            sim._board_hash ^= keys[i]
+        return sim
+
+    def _simulate(self, players, actions):
+        """Perform one game step of Spe_ed on the bitboard."""
+        width, height = self._width, self._height
+        occupied = self._occupied
+        owners = dict(self._owners)
+        crashed = self._crashed
+        jump = self.rounds % 6 == 0
+
+        # Perform actions
+        for player, action in zip(players, actions):
+            player.perform(action)
+
+        # Move players
+        newly_occupied = []  # Cells written in this round by each player
+        all_newly_occupied = 0
+        for player in players:
+            if not player.active:
+                continue
+            x, y, speed = int(player.x), int(player.y), player.speed
+            dx, dy = direction_offsets[player.direction_index]
+
+            # Number of steps until the bounds are reached
+            if dx > 0:
+                n_inside = width - 1 - x
+            elif dx < 0:
+                n_inside = x
+            elif dy > 0:
+                n_inside = height - 1 - y
+            else:
+                n_inside = y
+            n_steps = min(speed, n_inside)
+
+            start = y * width + x
+            stride = dx + dy * width
+            if stride > 0:
+                path = _line_mask(stride, n_steps, speed, jump, False) << (start + stride)
+            else:
+                path = _line_mask(-stride, n_steps, speed, jump, True) << (start + n_steps * stride)
+
+            hits = path & occupied
+            if hits:  # Collision
+                player.active = False
+                crashed |= hits
+                for other, other_cells in newly_occupied:
+                    if hits & other_cells:  # Occupancy is from this round
+                        other.active = False  # Other player loses, too
+
+            written = path & ~hits
+            occupied |= path
+            owners[player.player_id] = owners.get(player.player_id, 0) | written
+            newly_occupied.append((player, written))
+            all_newly_occupied |= written
+
+            if speed > n_inside:  # Player left bounds, position is the first outside the bounds
+                player.active = False
+                player.x, player.y = x + dx * (n_inside + 1), y + dy * (n_inside + 1)
+            else:
+                player.x, player.y = x + dx * speed, y + dy * speed
+
+        return occupied, owners, crashed, all_newly_occupied
+
+    def undo(self):
+        """Undo the last simulation step"""
+        return self.parent
+
+    @property
+    def cells(self):
+        """Cell state as ndarray, computed on first access."""
+        if self._cells is None:
+            cells = self._base.copy()
+            flat = cells.reshape(-1)
+            for player_id, bits in self._owners.items():
+                flat[from_bits(bits, flat.size)] = player_id
+            flat[from_bits(self._crashed, flat.size)] = -1
+            self._cells = cells
+        return self._cells
+
+    @property
+    def changed(self):
+        """Newly occupied cells of the last step, computed on first access."""
+        if self._changed is None:
+            self._changed = [(i % self._width, i // self._width) for i in bit_indices(self._newly_occupied)]
+        return self._changed
+
+    @property
+    def occupied(self):
+        """Occupancy bitboard, bit `y * width + x` is set if cell `(x, y)` is occupied."""
+        return self._occupied
+
+    @property
+    def zobrist(self):
+        """64-bit Zobrist hash of the state, see `environments.zobrist.state_hash`."""
+        return zobrist.state_hash(self._board_hash, self.players, self.rounds)
+
+    @property
+    def player(self):
+        """Shorthand for the first player"""
+        return self.players[0]
@@ -0,0 +1,249 @@
+import json
+import struct
+
+import numpy as np
+
+from environments.spe_ed import directions, directions_by_name
+
+magic = b"SPEDLOG\x01"  # File signature and format version
+suffix = ".spedlog"
+
+_length = struct.Struct("<I")
+_extra_length = struct.Struct("<H")
+_player = np.dtype([("x", "<i2"), ("y", "<i2"), ("direction", "u1"), ("speed", "u1"), ("active", "u1")])
+
+
+def is_compact_log(file_name):
+    """Check whether a file is a compact game log by its signature."""
+    with open(file_name, "rb") as f:
+        return f.read(len(magic)) == magic
+
+
+class CompactLogWriter:
+    """Writes game states in the compact log format.
+
+    The format consists of a header, the initial board and one record per state. Each record only contains the cells
+    changed since the previous state, the players and the remaining keys of the state. Records are self-delimiting,
+    thus truncated files can be read up to their last complete record.
+    """
+
+    def __init__(self, f, cells, player_ids):
+        """Initialize CompactLogWriter and write the header.
+
+        Args:
+            f: File opened in binary mode
+            cells: Board of the first state
+            player_ids: Ids of all players as strings, in the order of the `players` of each state
+        """
+        self.f = f
+        self.player_ids = list(player_ids)
+        height, width = np.shape(cells)
+        header = json.dumps({"width": width, "height": height, "players": self.player_ids}).encode()
+        f.write(magic + _length.pack(len(header)) + header)
+        f.write(np.asarray(cells, dtype=np.int8).tobytes())
+
+    def write(self, indices, values, players, extra):
+        """Append one state.
+
+        Args:
+            indices: Flat indices of all cells changed since the previous state
+            values: New values of these cells
+            players: JSON `players` of the state
+            extra: All other keys of the state, except `width`, `height`, `cells` and `players`
+        """
+        indices = np.asarray(indices, dtype="<u4")
+        packed = np.empty(len(self.player_ids), dtype=_player)
+        names = {}
+        for i, player_id in enumerate(self.player_ids):
+            p = players[player_id]
+            packed[i] = (p["x"], p["y"], directions_by_name[p["direction"]].index, p["speed"], p["active"])
+            if p.get("name") is not None:
+                names[player_id] = p["name"]
+        if names:
+            extra = dict(extra, names=names)
+        extra = json.dumps(extra, separators=(",", ":")).encode()
+
+        self.f.write(
+            _length.pack(len(indices))
+            + indices.tobytes()
+            + np.asarray(values, dtype=np.int8).tobytes()
+            + packed.tobytes()
+            + _extra_length.pack(len(extra))
+            + extra
+        )
+
+
+def write_states(f, states):
+    """Write complete JSON game states in the compact log format."""
+    board = np.array(states[0]["cells"], dtype=np.int8)
+    writer = CompactLogWriter(f, board, states[0]["players"].keys())
+    for state in states:
+        cells = np.array(state["cells"], dtype=np.int8).ravel()
+        indices = np.flatnonzero(cells != board.ravel())
+        writer.write(indices, cells[indices], state["players"], _extra(state))
+        board = cells.reshape(board.shape)
+
+
+class GameRecorder:
+    """Streams the states of a running game into a compact log.
+
+    Only the previous board is kept, thus memory is constant. Each state is flushed immediately, so the log of a
+    crashed game can still be loaded up to its last recorded state.
+    """
+
+    def __init__(self, file_name):
+        """Initialize GameRecorder.
+
+        Args:
+            file_name: Path of the log to write
+        """
+        self.file_name = file_name
+        self.f = open(file_name, "wb")
+        self.writer = None
+        self.board = None  # Flat board of the previous state
+
+    def record(self, state, cells=None):
+        """Append a state.
+
+        Args:
+            state: JSON game state, `cells` may be omitted if given separately
+            cells: Board of the state as ndarray, avoids converting it to and from lists
+        """
+        board = np.asarray(state["cells"] if cells is None else cells, dtype=np.int8)
+        if self.writer is None:
+            self.writer = CompactLogWriter(self.f, board, state["players"].keys())
+            self.board = board.ravel().copy()
+
+        board = board.ravel()
+        indices = np.flatnonzero(board != self.board)
+        self.writer.write(indices, board[indices], state["players"], _extra(state))
+        self.board[indices] = board[indices]
+        self.f.flush()
+
+    def close(self):
+        """Close the log file."""
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _extra(state):
+    """Keys of a state, which are not stored separately."""
+    return {k: v for k, v in state.items() if k not in ("width", "height", "cells", "players")}
+
+
+class CompactLog:
+    """Game states read from a compact log.
+
+    Behaves like the list of JSON states, with `cells` as ndarray. Boards are rebuilt on access by applying the
+    changes of all records since the last rebuilt board.
+    """
+
+    def __init__(self, data):
+        """Initialize CompactLog.
+
+        Args:
+            data: Content of the log file
+        """
+        if data[: len(magic)] != magic:
+            raise ValueError("Not a compact game log")
+        offset = len(magic)
+        (header_length,) = _length.unpack_from(data, offset)
+        offset += _length.size
+        header = json.loads(data[offset : offset + header_length])
+        offset += header_length
+
+        self.width, self.height = header["width"], header["height"]
+        self.player_ids = header["players"]
+        size = self.width * self.height
+        self.initial = np.frombuffer(data, dtype=np.int8, count=size, offset=offset)
+        offset += size
+
+        # Split records, stop at an incomplete record
+        self.records = []
+        n_players = len(self.player_ids)
+        while offset + _length.size <= len(data):
+            try:
+                (n_changed,) = _length.unpack_from(data, offset)
+                start = offset + _length.size
+                indices = np.frombuffer(data, dtype="<u4", count=n_changed, offset=start)
+                values = np.frombuffer(data, dtype=np.int8, count=n_changed, offset=start + 4 * n_changed)
+                start += 5 * n_changed
+                players = np.frombuffer(data, dtype=_player, count=n_players, offset=start)
+                start += players.nbytes
+                (extra_length,) = _extra_length.unpack_from(data, start)
+                start += _extra_length.size
+                if start + extra_length > len(data):
+                    break
+                extra = json.loads(data[start : start + extra_length])
+            except (ValueError, struct.error):  # Truncated
+                break
+            self.records.append((indices, values, players, extra))
+            offset = start + extra_length
+
+        self._board_t = -1  # Index of the last rebuilt board
+        self._board = self.initial.copy()
+
+    @classmethod
+    def load(cls, file_name):
+        """Read a compact log file."""
+        with open(file_name, "rb") as f:
+            return cls(f.read())
+
+    def board(self, t):
+        """Rebuild the board of state `t`."""
+        if t < self._board_t:  # Restart from the initial board
+            self._board_t, self._board = -1, self.initial.copy()
+        for indices, values, _, _ in self.records[self._board_t + 1 : t + 1]:
+            self._board[indices] = values
+        self._board_t = t
+        return self._board.reshape(self.height, self.width).copy()
+
+    def players(self, t):
+        """JSON `players` of state `t`."""
+        _, _, players, extra = self.records[t]
+        names = extra.get("names", {})
+        result = {}
+        for player_id, p in zip(self.player_ids, players):
+            result[player_id] = {
+                "x": int(p["x"]),
+                "y": int(p["y"]),
+                "direction": directions[p["direction"]].name,
+                "speed": int(p["speed"]),
+                "active": bool(p["active"]),
+            }
+            if player_id in names:
+                result[player_id]["name"] = names[player_id]
+        return result
+
+    def __getitem__(self, t):
+        if isinstance(t, slice):
+            return [self[i] for i in range(*t.indices(len(self)))]
+        t = range(len(self))[t]  # Resolve negative indices, check bounds
+        extra = {k: v for k, v in self.records[t][3].items() if k != "names"}
+        return {"width": self.width, "height": self.height, "cells": self.board(t), "players": self.players(t), **extra}
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return (self[t] for t in range(len(self)))
+
+
+def json_to_compact(json_file, compact_file):
+    """Convert a log in JSON format into the compact format."""
+    with open(json_file) as f:
+        states = json.load(f)
+    with open(compact_file, "wb") as f:
+        write_states(f, states)
+
+
+def compact_to_json(compact_file, json_file):
+    """Convert a log in the compact format into JSON format."""
+    states = [dict(state, cells=state["cells"].tolist()) for state in CompactLog.load(compact_file)]
+    with open(json_file, "w") as f:
+        json.dump(states, f, separators=(",", ":"))
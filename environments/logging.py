@@ -7,13 +7,23 @@ from pathlib import Path
 import owncloud
 import pandas as pd
 
+from environments import game_log
+
 
 class Spe_edLogger:
-    def __init__(self, log_dir="logs/", callbacks=[]):
+    def __init__(self, log_dir="logs/", callbacks=[], compact=False):
+        """Initialize Spe_edLogger.
+
+        Args:
+            log_dir: Directory to store the logs in
+            callbacks: Functions called with the path of each written log
+            compact: Write logs in the compact format of `environments.game_log` instead of JSON
+        """
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(parents=True, exist_ok=True)
 
         self.callbacks = callbacks
+        self.compact = compact
 
     def log(self, states, time_limits):
         """Handle the logging of a completed game.
@@ -21,12 +31,51 @@ class Spe_edLogger:
         Args:
             states: List of game states in form of parsed json.
         """
-        log_file = self.log_dir / f"{datetime.now():%Y%m%d-%H%M%S}.json"
-        with open(log_file, "w") as f:
-            json.dump(states, f, separators=(",", ":"))
+        if self.compact:
+            log_file = self.log_dir / f"{datetime.now():%Y%m%d-%H%M%S}{game_log.suffix}"
+            with open(log_file, "wb") as f:
+                game_log.write_states(f, states)
+        else:
+            log_file = self.log_dir / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+            with open(log_file, "w") as f:
+                json.dump(states, f, separators=(",", ":"))
+
+        self._finish(log_file, time_limits)
+
+    def recorder(self):
+        """Create a recorder, which streams the states of a running game into the log directory."""
+        return game_log.GameRecorder(self.log_dir / f"{datetime.now():%Y%m%d-%H%M%S}{game_log.suffix}")
+
+    def finish(self, recorder, time_limits):
+        """Handle the logging of a game recorded by a recorder from `recorder()`.
+
+        Args:
+            recorder: Recorder of the completed game
+            time_limits: Time limit of each round
+        """
+        recorder.close()
+        log_file = Path(recorder.file_name)
+        if not self.compact:  # Convert into JSON
+            json_file = log_file.with_suffix(".json")
+            game_log.compact_to_json(log_file, json_file)
+            log_file.unlink()
+            log_file = json_file
+
+        self._finish(log_file, time_limits)
+
+    def abort(self, recorder):
+        """Keep the log of a game, which was not completed, apart from the complete logs.
+
+        The log can still be loaded by `SavedGame.load(..., allow_incomplete=True)`, but is skipped by statistics.
+        """
+        recorder.close()
+        log_file = Path(recorder.file_name)
+        log_file.rename(log_file.with_name(log_file.name + ".incomplete"))
 
+    def _finish(self, log_file, time_limits):
+        """Write the time limits and call the callbacks for a written log."""
         if len(time_limits) > 0:
-            time_file = log_file.parent / (log_file.name[:-5] + ".csv")
+            time_file = log_file.parent / (log_file.stem + ".csv")
             pd.DataFrame({"time_limit": time_limits}).to_csv(time_file, index=False)
 
         # Handle callbacks
@@ -0,0 +1,108 @@
+from dataclasses import dataclass
+from multiprocessing import util
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from environments.spe_ed import Cells
+
+max_height = 80
+max_width = 80
+_slot_size = max_height * max_width
+
+_attached = {}  # Shared memory blocks attached by this process, by name
+
+
+def detach():
+    """Close all shared memory blocks attached by this process.
+
+    Views of boards from `BoardHandle.cells` must not be used afterwards.
+    """
+    for shm in _attached.values():
+        shm.close()
+    _attached.clear()
+
+
+def detach_at_exit():
+    """Detach from all shared memory blocks, when a worker process exits, e.g. in the initializer of a pool."""
+    util.Finalize(None, detach, exitpriority=10)
+
+
+@dataclass(frozen=True)
+class BoardHandle:
+    """Reference to a board in a `SharedBoardPool`, cheap to pickle."""
+
+    name: str
+    slot: int
+    height: int
+    width: int
+    binary: bool
+
+    def cells(self):
+        """Get a read-only `Cells` view of the referenced board.
+
+        The view is only valid until the board is released from the pool.
+        """
+        shm = _attached.get(self.name)
+        if shm is None:  # Attach once per process
+            shm = _attached[self.name] = SharedMemory(name=self.name)
+        size = self.height * self.width
+        cells = np.ndarray(size, dtype=np.int8, buffer=shm.buf, offset=self.slot * _slot_size).reshape(
+            self.height, self.width
+        )
+        if self.binary:
+            cells = cells.view(bool)
+        cells.setflags(write=False)  # Prevent accidentally writing
+        return Cells(cells)
+
+
+class SharedBoardPool:
+    """Pre-allocated shared memory for passing boards to worker processes.
+
+    Boards up to `max_height x max_width` are stored as int8 in fixed slots. Workers only receive a `BoardHandle`
+    and read the board from shared memory, instead of unpickling a copy for each task.
+
+    Create the pool before starting worker processes. Otherwise, forked workers start their own resource tracker,
+    which unlinks the shared memory, when they exit.
+    """
+
+    def __init__(self, n_slots):
+        """Initialize SharedBoardPool.
+
+        Args:
+            n_slots: Maximum number of boards stored at the same time
+        """
+        self.shm = SharedMemory(create=True, size=n_slots * _slot_size)
+        self.free_slots = list(range(n_slots))
+
+    def put(self, cells):
+        """Copy a board into a free slot.
+
+        Args:
+            cells: Board with cell values in the range of int8, boolean boards are returned as boolean views
+        Returns:
+            `BoardHandle` of the stored board
+        """
+        height, width = cells.shape
+        if height > max_height or width > max_width:
+            raise ValueError(f"Board of shape {cells.shape} exceeds maximum shape {(max_height, max_width)}")
+        if len(self.free_slots) == 0:
+            raise RuntimeError("No free slot in SharedBoardPool")
+
+        slot = self.free_slots.pop()
+        data = np.ndarray(height * width, dtype=np.int8, buffer=self.shm.buf, offset=slot * _slot_size)
+        data[:] = np.ravel(cells)
+        del data  # Release the buffer
+        return BoardHandle(self.shm.name, slot, height, width, cells.dtype == bool)
+
+    def release(self, handle):
+        """Free the slot of a board, which is no longer used by any worker."""
+        self.free_slots.append(handle.slot)
+
+    def close(self):
+        """Free the shared memory, all handles become invalid."""
+        self.shm.close()
+        self.shm.unlink()
+
+    def __getstate__(self):
+        raise TypeError("SharedBoardPool can not be pickled, pass a `BoardHandle` instead")
@@ -2,13 +2,34 @@ import time
 
 import numpy as np
 
-from environments.spe_ed import Player, directions
+from environments import zobrist
+from environments.spe_ed import Player, direction_offsets, directions, max_speed
 from environments.spe_ed_env import Spe_edEnv
 
 
-def simulate(cells, players, rounds, actions):
-    """Perfroma one game step of Spe_ed."""
+def _move_steps(direction_index, speed, jump):
+    """Steps `(i, dx, dy)` of all cells touched by a move, relative to the start."""
+    dx, dy = direction_offsets[direction_index]
+    return tuple((i, dx * i, dy * i) for i in range(1, speed + 1) if not (jump and 1 < i < speed))
+
+
+# Touched cells of each move, indexed by [direction index][speed][jump]
+_moves = tuple(
+    tuple((_move_steps(d, speed, False), _move_steps(d, speed, True)) for speed in range(max_speed + 1))
+    for d in range(4)
+)
+
+
+def simulate(cells, players, rounds, actions, undo=None):
+    """Perfroma one game step of Spe_ed.
+
+    Args:
+        cells, players, rounds: Game state, `cells` and `players` are modified in place
+        actions: Action of each player, either by name or by code
+        undo: Optional list, previous values of all written cells are appended as `(y, x, value)`
+    """
     height, width = cells.shape
+    jump = rounds % 6 == 0
 
     # Perform actions
     for player, action in zip(players, actions):
@@ -19,31 +40,45 @@ def simulate(cells, players, rounds, actions):
     for player in players:
         if not player.active:
             continue
-        pos = player.position
-        for i in range(player.speed):
-            pos += player.direction.cartesian
-            if pos[0] < 0 or pos[1] < 0 or pos[1] >= height or pos[0] >= width:
-                # Player left bounds
-                player.active = False
-                break  # Position after leaving the bouds is not actual position, just the first outside the bounds
+        x, y, speed = int(player.x), int(player.y), player.speed
+        dx, dy = direction_offsets[player.direction_index]
 
-            # Check for jumps
-            if rounds % 6 == 0 and i > 0 and i < player.speed - 1:
-                continue
+        # Number of steps until the bounds are reached, positions are on a line
+        if dx > 0:
+            n_inside = width - 1 - x
+        elif dx < 0:
+            n_inside = x
+        elif dy > 0:
+            n_inside = height - 1 - y
+        else:
+            n_inside = y
+
+        for i, step_x, step_y in _moves[player.direction_index][speed][jump]:
+            if i > n_inside:  # Left bounds
+                break
+            pos = (x + step_x, y + step_y)
+
+            if undo is not None:  # Remember previous value
+                undo.append((pos[1], pos[0], cells[pos[1], pos[0]]))
 
             if cells[pos[1], pos[0]] != 0:
                 # Collision
                 player.active = False
                 cells[pos[1], pos[0]] = -1
 
-                if tuple(pos) in newly_occupied:  # Occupancy is from this round
-                    newly_occupied[tuple(pos)].active = False  # Other player loses, too
+                if pos in newly_occupied:  # Occupancy is from this round
+                    newly_occupied[pos].active = False  # Other player loses, too
             else:
                 # No collision
                 cells[pos[1], pos[0]] = player.player_id
-                newly_occupied[tuple(pos)] = player  # Remember this cell
-        player.x = pos[0]
-        player.y = pos[1]
+                newly_occupied[pos] = player  # Remember this cell
+
+        if speed > n_inside:
+            # Player left bounds, position is not actual position, just the first outside the bounds
+            player.active = False
+            speed = n_inside + 1
+        player.x = x + dx * speed
+        player.y = y + dy * speed
 
     # Round completed
     rounds += 1
@@ -71,7 +106,9 @@ class SimulatedSpe_edEnv(Spe_edEnv):
                 actions.append("change_nothing")
 
         # Perform simulation step
-        _, _, self.rounds, _ = simulate(self.cells, self.players, self.rounds, actions)
+        _, _, self.rounds, changed = simulate(self.cells, self.players, self.rounds, actions)
+        self.update_board_hash(changed)
+        self.update_occupancy(changed)
         self.deadline = time.time() + self.time_limit
 
         done = sum(1 for p in self.players if p.active) < 2
@@ -86,6 +123,7 @@ class SimulatedSpe_edEnv(Spe_edEnv):
         self.rounds = 1
         self.cells[:] = 0  # Clear occupancies
         self.players.clear()
+        self.board_hash = None
 
         # Generate players
         for i in range(len(self.opponent_policies) + 1):
@@ -109,47 +147,124 @@ class SimulatedSpe_edEnv(Spe_edEnv):
                     active=True,
                 )
             )
+        self.update_occupancy()
         self.controlled_player = self.players[0]  # Control first player
         self.deadline = time.time() + self.time_limit
 
         return self._get_obs(self.controlled_player)
 
-    def game_state(self):
+    def game_state(self, include_cells=True):
         """Get current game state as dict."""
-        return {
+        state = {
             "width": self.width,
             "height": self.height,
-            "cells": self.cells.tolist(),
+            "cells": self.cells.tolist() if include_cells else None,
             "players": dict(p.to_dict() for p in self.players),
             "you": self.controlled_player.player_id,
             "running": sum(1 for p in self.players if p.active) > 1,
         }
+        if not include_cells:
+            del state["cells"]
+        return state
 
 
 class Spe_edSimulator:
     """State for the simulate function.
 
-    Keeps a history.
+    Keeps a history. Steps can either be performed immutable with `step`, or in place with `apply` and `revert`.
+
+    The Zobrist hash of the board is computed on first access and updated incrementally afterwards.
     """
 
-    def __init__(self, cells, players, rounds, changed=[], parent=None):
+    def __init__(self, cells, players, rounds, changed=[], parent=None, board_hash=None):
         self.cells = cells
         self.players = players
         self.rounds = rounds
         self.changed = changed
         self.parent = parent
+        self._board_hash = board_hash
+        self._regions = None
+        self._undo_records = []
 
     def step(self, actions):
         """Perform one simulation step"""
-        return Spe_edSimulator(
+        sim = Spe_edSimulator(
             *simulate(self.cells.copy(), [p.copy() for p in self.players], self.rounds, actions),
             parent=self,
         )
+        if self._board_hash is not None:  # Update hash incrementally, otherwise computed on demand
+            sim._board_hash = zobrist.update_board_hash(self._board_hash, sim.changed, sim.cells.shape)
+        if self._regions is not None:  # Update regions incrementally, otherwise computed on demand
+            sim._regions = self._regions.copy()
+            sim._fill_regions([(p.x, p.y) for p in self.players if p.active])
+        return sim
 
     def undo(self):
         """Undo the last simulation step"""
         return self.parent
 
+    def apply(self, actions):
+        """Perform one simulation step in place.
+
+        Modifies `cells` and `players` of this state, thus both must not be shared with other states.
+        Undo records are kept, so the step can be reverted with `revert`.
+        """
+        writes = []
+        players = [(p.x, p.y, p.direction, p.speed, p.active) for p in self.players]
+        changed, board_hash = self.changed, self._board_hash
+
+        _, _, self.rounds, self.changed = simulate(self.cells, self.players, self.rounds, actions, undo=writes)
+        if self._board_hash is not None:
+            self._board_hash = zobrist.update_board_hash(self._board_hash, self.changed, self.cells.shape)
+        regions_record = None
+        if self._regions is not None:
+            regions_record = self._fill_regions([(x, y) for x, y, _, _, active in players if active])
+
+        self._undo_records.append((writes, players, changed, board_hash, regions_record))
+
+    def revert(self):
+        """Revert the last simulation step performed by `apply`."""
+        writes, players, self.changed, self._board_hash, regions_record = self._undo_records.pop()
+        if regions_record is not None:
+            self._regions.restore(regions_record)
+        else:  # Regions were created after this step
+            self._regions = None
+
+        for y, x, value in reversed(writes):
+            self.cells[y, x] = value
+        for player, (x, y, direction, speed, active) in zip(self.players, players):
+            player.x, player.y, player.direction, player.speed, player.active = x, y, direction, speed, active
+        self.rounds -= 1
+
+    @property
+    def board_hash(self):
+        """64-bit Zobrist hash of the board occupancy."""
+        if self._board_hash is None:
+            self._board_hash = zobrist.board_hash(self.cells)
+        return self._board_hash
+
+    @property
+    def zobrist(self):
+        """64-bit Zobrist hash of the state, see `environments.zobrist.state_hash`."""
+        return zobrist.state_hash(self.board_hash, self.players, self.rounds)
+
+    @property
+    def regions(self):
+        """`RegionTracker` of the free cells, heads of active players count as free.
+
+        Created on first access and updated incrementally by all following steps.
+        """
+        if self._regions is None:
+            from state_representation.regions import RegionTracker  # Avoid circular import
+
+            self._regions = RegionTracker(self.cells, [p for p in self.players if p.active])
+        return self._regions
+
+    def _fill_regions(self, previous_heads):
+        """Update the regions by the cells filled in the last step, given the heads of previously active players."""
+        heads = {(p.x, p.y) for p in self.players if p.active}
+        return self._regions.fill(c for c in list(previous_heads) + list(self.changed) if c not in heads)
+
     @property
     def player(self):
         """Shorthand for the first player"""
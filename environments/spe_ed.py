@@ -1,9 +1,13 @@
 import json
+import re
 from dataclasses import dataclass
 
 import numpy as np
 
 actions = ("turn_left", "turn_right", "slow_down", "speed_up", "change_nothing")
+action_codes = {a: code for code, a in enumerate(actions)}  # Integer code of each action, its index in `actions`
+max_speed = 10
+board_padding = max_speed  # Width of the occupied border of padded boards, enough for all moves
 
 
 @dataclass(frozen=True)
@@ -17,11 +21,11 @@ class Direction(np.lib.mixins.NDArrayOperatorsMixin):
 
     def turn_left(self):
         """Rotates one turn to the left."""
-        return directions[(self.index + 3) % 4]
+        return _directions[(self.index + 3) % 4]
 
     def turn_right(self):
         """Rotates one turn to the right."""
-        return directions[(self.index + 1) % 4]
+        return _directions[(self.index + 1) % 4]
 
     def __repr__(self):
         return self.name
@@ -38,19 +42,55 @@ directions[2] = Direction(2, "left", np.pi, np.array([-1, 0]))
 directions[3] = Direction(3, "up", np.pi * 3 / 2, np.array([0, -1]))
 directions.setflags(write=False)  # Prevent accidentally writing
 directions_by_name = {d.name: d for d in directions}
+_directions = tuple(directions)  # Faster indexing than the object array
+direction_offsets = tuple((int(d.cartesian[0]), int(d.cartesian[1])) for d in directions)  # `(dx, dy)` by index
+
+
+def _transition(direction_index, speed, action):
+    """Effect of an action code on direction index and speed."""
+    if actions[action] == "turn_left":
+        direction_index = (direction_index + 3) % 4
+    elif actions[action] == "turn_right":
+        direction_index = (direction_index + 1) % 4
+    elif actions[action] == "slow_down":
+        speed -= 1
+    elif actions[action] == "speed_up":
+        speed += 1
+    return direction_index, speed, 1 <= speed <= max_speed
+
+
+# `(new direction index, new speed, alive)`, indexed by [direction index][speed][action code]
+transitions = tuple(
+    tuple(tuple(_transition(d, speed, a) for a in range(len(actions))) for speed in range(max_speed + 1))
+    for d in range(4)
+)
 
 
-@dataclass
 class Player:
-    """Player object."""
+    """Player object.
+
+    Uses `__slots__` and stores the direction as index, as search code creates and copies many players.
+    """
+
+    __slots__ = ("player_id", "x", "y", "direction_index", "speed", "active", "name")
+
+    def __init__(self, player_id, x, y, direction, speed, active, name=None):
+        self.player_id = player_id
+        self.x = x
+        self.y = y
+        self.direction = direction
+        self.speed = speed
+        self.active = active
+        self.name = name
+
+    @property
+    def direction(self):
+        """Current `Direction`."""
+        return _directions[self.direction_index]
 
-    player_id: int
-    x: int
-    y: int
-    direction: str
-    speed: int
-    active: bool
-    name: str = None
+    @direction.setter
+    def direction(self, direction):
+        self.direction_index = direction.index if isinstance(direction, Direction) else int(direction)
 
     @property
     def position(self):
@@ -59,32 +99,30 @@ class Player:
 
     def copy(self):
         """Create a copy of this player."""
-        return Player(self.player_id, self.x, self.y, self.direction, self.speed, self.active, self.name)
+        player = Player.__new__(Player)  # Skip conversion of the direction
+        player.player_id = self.player_id
+        player.x = self.x
+        player.y = self.y
+        player.direction_index = self.direction_index
+        player.speed = self.speed
+        player.active = self.active
+        player.name = self.name
+        return player
 
     def perform(self, action):
-        """Let the player perform one action.
+        """Let the player perform one action, given by name or by code.
 
         This does not actually move the player.
         """
         if not self.active:
             return
 
-        if action == "turn_left":
-            self.direction = self.direction.turn_left()
-        elif action == "turn_right":
-            self.direction = self.direction.turn_right()
-        elif action == "slow_down":
-            self.speed -= 1
-            if self.speed < 1:  # Check minimum speed
-                self.active = False
-        elif action == "speed_up":
-            self.speed += 1
-            if self.speed > 10:  # Check maximum speed
-                self.active = False
-        elif action == "change_nothing":
-            pass
-        else:  # Invalid
+        if isinstance(action, str):
+            action = action_codes.get(action)
+        if action is None or not 0 <= action < len(actions):  # Invalid
             self.active = False
+            return
+        self.direction_index, self.speed, self.active = transitions[self.direction_index][self.speed][action]
 
     def __eq__(self, other):
         if self.__class__ == other.__class__:
@@ -92,12 +130,18 @@ class Player:
                 self.player_id == other.player_id
                 and self.x == other.x
                 and self.y == other.y
-                and self.direction == other.direction
+                and self.direction_index == other.direction_index
                 and self.speed == other.speed
                 and self.active == other.active
             )
         return False
 
+    def __repr__(self):
+        return (
+            f"Player(player_id={self.player_id}, x={self.x}, y={self.y}, direction={self.direction}, "
+            + f"speed={self.speed}, active={self.active}, name={self.name!r})"
+        )
+
     def __str__(self):
         return f"{self.player_id}: ({self.x}, {self.y}), {self.direction}, speed={self.speed}, active={self.active}"
 
@@ -130,14 +174,42 @@ class Player:
 
 
 class Cells(np.ndarray):
-    """Cell state wrapper for common methods."""
+    """Cell state wrapper for common methods.
+
+    Cells created by `Cells.padded` are a view into a larger buffer, which is surrounded by occupied cells. Then
+    lookups outside of the bounds need no special treatment.
+    """
+
+    buffer = None  # Padded buffer, `None` if not padded
+    padding = 0  # Width of the occupied border of the buffer
 
     def __new__(cls, cells):
         return cells.view(cls)
 
     def __array_finalize__(self, obj):
-        if obj is None:
-            return
+        # Views of the complete padded cells, e.g. by `Cells(cells)` or `view()`, share the buffer
+        buffer = getattr(obj, "buffer", None)
+        if (
+            buffer is not None
+            and self.shape == obj.shape
+            and self.dtype == obj.dtype
+            and self.__array_interface__["data"][0] == obj.__array_interface__["data"][0]
+        ):
+            self.buffer, self.padding = buffer, obj.padding
+
+    @classmethod
+    def padded(cls, cells, padding=board_padding):
+        """Copy cells into a buffer with an occupied border.
+
+        Args:
+            cells: Cell state
+            padding: Width of the border
+        """
+        buffer = np.ones((cells.shape[0] + 2 * padding, cells.shape[1] + 2 * padding), dtype=cells.dtype)
+        view = buffer[padding : padding + cells.shape[0], padding : padding + cells.shape[1]].view(cls)
+        view[:] = cells
+        view.buffer, view.padding = buffer, padding
+        return view
 
     @property
     def width(self):
@@ -155,6 +227,38 @@ class Cells(np.ndarray):
             return self[y, x] == 0
         return False
 
+    def are_free(self, positions, origin=(0, 0)):
+        """Check many locations at once, whether they are inside the bounds and not occupied.
+
+        Args:
+            positions: `(N, 2)` array-like of `(x, y)`
+            origin: `(x, y)` added to all positions, e.g. to check offsets relative to a player
+        Returns:
+            Boolean ndarray of length `N`
+        """
+        positions = np.asarray(positions) + origin
+        x, y = positions[:, 0], positions[:, 1]
+        if self.buffer is not None:  # Positions outside of the bounds hit the border
+            p = self.padding
+            return self.buffer[np.clip(y, -1, self.height) + p, np.clip(x, -1, self.width) + p] == 0
+
+        inside = (x >= 0) & (y >= 0) & (x < self.width) & (y < self.height)
+        # Clip to look up some cell for all positions, outside positions are masked afterwards
+        free = np.asarray(self)[np.clip(y, 0, self.height - 1), np.clip(x, 0, self.width - 1)] == 0
+        return inside & free
+
+
+def padded(cells, width):
+    """Get cells with a border of `width` occupied cells.
+
+    Returns a view into the buffer of padded `Cells` if its border is wide enough, which must not be written.
+    Otherwise, a padded copy is created.
+    """
+    if isinstance(cells, Cells) and cells.buffer is not None and cells.padding >= width:
+        start = cells.padding - width
+        return cells.buffer[start : start + cells.shape[0] + 2 * width, start : start + cells.shape[1] + 2 * width]
+    return np.pad(cells, width, constant_values=1)
+
 
 def infer_action(player_before, player_after):
     """Reconstruct that action that leads to the next state."""
@@ -173,6 +277,93 @@ def infer_action(player_before, player_after):
     return "change_nothing"
 
 
+def _decode_players(state):
+    """Create all players of a JSON state."""
+    return [Player.from_json(player_id, player_data) for player_id, player_data in state["players"].items()]
+
+
+# Strings, arrays without nested arrays, objects or strings (e.g. rows of cells) and brackets of JSON text
+_json_structure = re.compile(r'"(?:[^"\\]|\\.)*"|\[[^\[\]{}"]*\]|[{}\[\]]')
+
+
+def _scan_states(text):
+    """Count the states of a saved game in JSON format and decode only the last one.
+
+    Only strings and brackets are tokenized. Strings and flat arrays are skipped as a whole, such that the content of
+    strings is never mistaken for structure.
+
+    Returns:
+        Tuple of the number of states and the last state
+    """
+    depth, n_states, last_start = 0, 0, None
+    for match in _json_structure.finditer(text):
+        token = match.group()
+        if token == "{" or token == "[":
+            if depth == 1 and token == "{":  # State in the outer array
+                n_states += 1
+                last_start = match.start()
+            depth += 1
+        elif token == "}" or token == "]":
+            depth -= 1
+    state, _ = json.JSONDecoder().raw_decode(text, last_start)
+    return n_states, state
+
+
+class _LazyStates:
+    """Sequence of states, which are decoded on first access and kept afterwards."""
+
+    def __init__(self, n_states, decode):
+        """Initialize _LazyStates.
+
+        Args:
+            n_states: Number of states
+            decode: Function, which decodes the state at a given index
+        """
+        self.decode = decode
+        self.states = [None] * n_states
+
+    def __getitem__(self, t):
+        if isinstance(t, slice):
+            return [self[i] for i in range(*t.indices(len(self)))]
+        if self.states[t] is None:
+            self.states[t] = self.decode(t % len(self))
+        return self.states[t]
+
+    def __setitem__(self, t, state):
+        self.states[t] = state
+
+    def __len__(self):
+        return len(self.states)
+
+    def __iter__(self):
+        return (self[t] for t in range(len(self)))
+
+
+@dataclass
+class GameMetadata:
+    """Summary of a saved game, as loaded by `SavedGame.load_metadata`."""
+
+    rounds: int
+    width: int
+    height: int
+    you: int
+    players: list  # Players of the last state
+
+    @property
+    def winner(self):
+        """Winner is the last surviving player.
+
+        Returns `None` on draw.
+        """
+        active = [p for p in self.players if p.active]
+        return active[0] if len(active) > 0 else None
+
+    @property
+    def names(self):
+        """Return list of all player names in this game."""
+        return [p.name for p in self.players]
+
+
 class SavedGame:
     """Save game representation.
 
@@ -193,12 +384,10 @@ class SavedGame:
             data: JSON object
         """
         self.data = data
-        self.cell_states = [np.array(state["cells"], dtype=np.int8) for state in data]
-        self.player_states = [
-            [Player.from_json(player_id, player_data) for player_id, player_data in state["players"].items()]
-            for state in data
-        ]
-        self.height, self.width = self.cell_states[0].shape
+        # States are decoded on first access
+        self.cell_states = _LazyStates(len(data), lambda t: np.array(data[t]["cells"], dtype=np.int8))
+        self.player_states = _LazyStates(len(data), lambda t: _decode_players(data[t]))
+        self.height, self.width = len(data[0]["cells"]), len(data[0]["cells"][0])
 
     def infer_actions(self, t):
         """Compute action taken by all players at timestep `t`."""
@@ -237,23 +426,64 @@ class SavedGame:
         return self.data[0]["you"]
 
     @classmethod
-    def load(cls, file_name):
+    def load(cls, file_name, allow_incomplete=False):
         """Load a saved game.
 
         Args:
-            file_name: Path to the save game in json format.
+            file_name: Path to the save game in json or compact format.
+            allow_incomplete: Also load games, which were not completed, e.g. recorded until a crash
 
         Returns:
             SavedGame object
         """
-        with open(file_name) as f:
-            data = json.load(f)
+        from environments.game_log import CompactLog, is_compact_log  # Avoid circular import
 
-        if data[-1]["running"]:
+        if is_compact_log(file_name):
+            data = CompactLog.load(file_name)
+        else:
+            with open(file_name) as f:
+                data = json.load(f)
+
+        if data[-1]["running"] and not allow_incomplete:
             raise ValueError(f"Game not completed: {file_name}")
 
         return cls(data)
 
+    @staticmethod
+    def load_metadata(file_name):
+        """Load only the summary of a saved game, which is much faster than loading the complete game.
+
+        Only the last state is decoded, the number of rounds is derived from the number of states.
+
+        Args:
+            file_name: Path to the save game in json or compact format.
+
+        Returns:
+            GameMetadata object
+        """
+        from environments.game_log import CompactLog, is_compact_log  # Avoid circular import
+
+        if is_compact_log(file_name):  # Boards are not rebuilt
+            log = CompactLog.load(file_name)
+            state = dict(log.records[-1][3], players=log.players(len(log) - 1))
+            n_states, width, height = len(log), log.width, log.height
+        else:
+            with open(file_name) as f:
+                text = f.read()
+            n_states, state = _scan_states(text)
+            width, height = len(state["cells"][0]), len(state["cells"])
+
+        if state["running"]:
+            raise ValueError(f"Game not completed: {file_name}")
+
+        return GameMetadata(
+            rounds=n_states - 1,
+            width=width,
+            height=height,
+            you=state.get("you"),
+            players=_decode_players(state),
+        )
+
     def create_simulator(self, t):
         """Initialize a simulate with the gamestate at time `t`."""
         from environments.simulator import Spe_edSimulator
@@ -287,8 +517,8 @@ class SavedGame:
             t: timestep, zero-indexed, so t=0 equals rounds=1
             player_id: Id of the player to get the observation for
         """
-        occupancy = self.cell_states[t] != 0
+        occupancy = Cells.padded(self.cell_states[t] != 0)
         occupancy.setflags(write=False)  # Prevent accidentally writing
         you = self.player_states[t][player_id - 1]
         opponents = [p for p in self.player_states[t] if p.active and p.player_id != player_id]
-        return Cells(occupancy), you, opponents, t + 1
+        return occupancy, you, opponents, t + 1
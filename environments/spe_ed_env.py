@@ -1,6 +1,7 @@
 import gym
 import numpy as np
 
+from environments import zobrist
 from environments.spe_ed import Cells
 
 
@@ -8,6 +9,9 @@ class Spe_edEnv(gym.Env):
     """Base class for Spe_ed environments.
 
     Handles common operations like rendering.
+
+    The cells of all observations are read-only views of one padded occupancy buffer, which is updated in place by
+    each step. Thus, they are only valid until the next step, callers have to copy them to keep them longer.
     """
 
     def __init__(self, width, height):
@@ -15,10 +19,12 @@ class Spe_edEnv(gym.Env):
         self.height = height
 
         # Copy of game state
-        self.cells = np.empty((self.height, self.width), dtype=np.int8)
+        self.cells = Cells.padded(np.zeros((self.height, self.width), dtype=np.int8))  # Allocated once per game
+        self.occupancy = Cells.padded(np.zeros((self.height, self.width), dtype=bool))  # Observed, updated in place
         self.players = []
         self.controlled_player = None
         self.rounds = 1
+        self.board_hash = None  # Zobrist hash of cells, computed on demand
 
         self.viewer = None
 
@@ -60,21 +66,55 @@ class Spe_edEnv(gym.Env):
             action = "change_nothing"
         return action
 
+    def update_board_hash(self, changed):
+        """Update the board hash incrementally by the newly occupied cells of a simulation step."""
+        if self.board_hash is not None:
+            self.board_hash = zobrist.update_board_hash(self.board_hash, changed, self.cells.shape)
+
+    def update_occupancy(self, changed=None):
+        """Update the occupancy in place, by the newly occupied cells of a simulation step or completely."""
+        if changed is None:
+            np.not_equal(self.cells, 0, out=self.occupancy)
+        else:
+            for x, y in changed:
+                self.occupancy[y, x] = True
+
+    def set_cells(self, cells):
+        """Copy a board into the buffers of this environment, which are only reallocated if the size changes."""
+        if self.cells.shape != np.shape(cells):
+            self.height, self.width = np.shape(cells)
+            self.cells = Cells.padded(np.zeros((self.height, self.width), dtype=np.int8))
+            self.occupancy = Cells.padded(np.zeros((self.height, self.width), dtype=bool))
+        self.cells[:] = cells
+        self.update_occupancy()
+        self.board_hash = None
+
+    @property
+    def zobrist(self):
+        """64-bit Zobrist hash of the current game state, see `environments.zobrist.state_hash`."""
+        if self.board_hash is None:
+            self.board_hash = zobrist.board_hash(self.cells)
+        return zobrist.state_hash(self.board_hash, self.players, self.rounds)
+
     def _get_obs(self, player):
         """Get obersation from the perspective of a specific player.
 
-        Returned values can be used as input for a policy.
+        Returned values can be used as input for a policy. The cells change with the next step of the environment.
 
         Args:
             player_id: Id of the player to get the observation for
         """
-        occupancy = self.cells != 0
+        occupancy = self.occupancy.view()  # Shares the padded buffer
         occupancy.setflags(write=False)  # Prevent accidentally writing
         you = player
         opponents = [p for p in self.players if p.active and p.player_id != player.player_id]
         deadline = self.deadline - 0.5  # Add safety margin of 0.5s
-        return Cells(occupancy), you, opponents, self.rounds, deadline
+        return occupancy, you, opponents, self.rounds, deadline
 
-    def game_state(self):
-        """Get current game state as dict."""
+    def game_state(self, include_cells=True):
+        """Get current game state as dict.
+
+        Args:
+            include_cells: Whether to include the board as nested lists, which is expensive for large boards
+        """
         raise NotImplementedError
@@ -64,9 +64,7 @@ class WebsocketEnv(Spe_edEnv):
             self.time_limit = self.deadline - time.time()
 
         self.players = [Player.from_json(player_id, player_data) for player_id, player_data in state["players"].items()]
-        self.width = state["width"]
-        self.height = state["height"]
-        self.cells = np.array(state["cells"])
+        self.set_cells(state["cells"])  # Updates width and height
         self.controlled_player = [player for player in self.players if int(player.player_id) == state["you"]][0]
 
         logging.info(
@@ -93,8 +91,8 @@ class WebsocketEnv(Spe_edEnv):
         elapsed_time = time.time() + self.time_limit - self.deadline
         logging.info(f"Client sent action {action}, took {elapsed_time:.02f}s ({elapsed_time / self.time_limit:.02%})")
 
-    def game_state(self):
-        """Get current game state as dict."""
+    def game_state(self, include_cells=True):
+        """Get current game state as dict, cells are always included as they were received."""
         return self.__game_state
 
 
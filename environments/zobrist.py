@@ -0,0 +1,83 @@
+from functools import lru_cache
+
+import numpy as np
+
+_mask = 2**64 - 1
+
+
+@lru_cache(maxsize=None)
+def cell_keys(height, width):
+    """Random 64-bit key for every cell of a board, indexed by `y * width + x`.
+
+    Keys are deterministic for a given board shape, thus hashes are comparable between processes.
+    """
+    rng = np.random.default_rng([2021, height, width])
+    keys = rng.integers(0, np.iinfo(np.uint64).max, size=height * width, dtype=np.uint64, endpoint=True)
+    keys.setflags(write=False)  # Prevent accidentally writing
+    return keys
+
+
+@lru_cache(maxsize=None)
+def cell_key_list(height, width):
+    """Keys of `cell_keys` as list of python ints for fast scalar updates."""
+    return cell_keys(height, width).tolist()
+
+
+def board_hash(cells):
+    """Compute the hash of the occupancy of a board from scratch."""
+    keys = cell_keys(*cells.shape)
+    return int(np.bitwise_xor.reduce(keys[np.ravel(cells) != 0]))
+
+
+def update_board_hash(board, positions, shape):
+    """Incrementally update a board hash by toggling the occupancy of some cells.
+
+    Args:
+        board: Previous board hash
+        positions: Iterable of `(x, y)` of all cells, whose occupancy has changed
+        shape: Shape of the board
+    """
+    height, width = shape
+    keys = cell_key_list(height, width)
+    for x, y in positions:
+        board ^= keys[y * width + x]
+    return board
+
+
+def _mix(value):
+    """Scramble a 64-bit integer (splitmix64 finalizer)."""
+    value = (value + 0x9E3779B97F4A7C15) & _mask
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _mask
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _mask
+    return value ^ (value >> 31)
+
+
+def player_hash(player):
+    """Compute the hash of all fields of a player, which are relevant for the game."""
+    return _mix(
+        int(player.player_id)
+        | (int(player.x) + 256) << 8
+        | (int(player.y) + 256) << 20
+        | player.direction_index << 32
+        | (int(player.speed) + 1) << 36
+        | int(player.active) << 44
+    )
+
+
+def rounds_hash(rounds):
+    """Compute the hash of the rounds, only `rounds % 6` is relevant for the game."""
+    return _mix(1 << 48 | rounds % 6)
+
+
+def state_hash(board, players, rounds):
+    """Combine the board hash with players and rounds to the hash of a complete state.
+
+    Args:
+        board: Board hash as computed by `board_hash`
+        players: List of players
+        rounds: Number of this round
+    """
+    value = board ^ rounds_hash(rounds)
+    for player in players:
+        value ^= player_hash(player)
+    return value
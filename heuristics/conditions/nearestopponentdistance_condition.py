@@ -1,8 +1,7 @@
 import numpy as np
-from scipy import ndimage
-from scipy.ndimage import morphology
 
 from heuristics.conditions import Condition
+from state_representation.analysis import label_regions, morphology
 
 
 class NearestOpponentDistanceCondition(Condition):
@@ -24,18 +23,12 @@ class NearestOpponentDistanceCondition(Condition):
             return 0
 
         if self.opening_iterations:
-            cells = morphology.binary_opening(cells, iterations=self.opening_iterations)
+            cells = morphology(cells, "binary_opening", self.opening_iterations)
 
         players = [player] + opponents
 
-        # inverse map (mask occupied cells)
-        empty = cells == 0
-        # Clear cell for all active players
-        for p in players:
-            empty[p.y, p.x] = True
-
-        # compute distinct regions
-        labelled, _ = ndimage.label(empty)
+        # compute distinct regions, cells of all active players are cleared
+        labelled, _ = label_regions(cells, players)
 
         # Get the region each player is in
         player_regions = np.array([labelled[p.y, p.x] for p in players])
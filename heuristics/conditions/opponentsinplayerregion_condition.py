@@ -1,8 +1,7 @@
 import numpy as np
-from scipy import ndimage
-from scipy.ndimage import morphology
 
 from heuristics.conditions.condition import Condition
+from state_representation.analysis import label_regions, morphology
 
 
 class OpponentsInPlayerRegionCondition(Condition):
@@ -16,18 +15,12 @@ class OpponentsInPlayerRegionCondition(Condition):
         """Return number of opponents in own region."""
 
         if self.closing_iterations:
-            cells = morphology.binary_closing(cells, iterations=self.closing_iterations)
+            cells = morphology(cells, "binary_closing", self.closing_iterations)
 
         players = [player] + opponents
 
-        # inverse map (mask occupied cells)
-        empty = cells == 0
-        # Clear cell we're in and for all active opponents
-        for p in players:
-            empty[p.y, p.x] = True
-
-        # compute distinct regions
-        labelled, _ = ndimage.label(empty)
+        # compute distinct regions, cell we're in and for all active opponents are cleared
+        labelled, _ = label_regions(cells, players)
 
         # Get the region each player is in
         regions = np.array([labelled[p.y, p.x] for p in players])
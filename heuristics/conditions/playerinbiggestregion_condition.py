@@ -1,8 +1,7 @@
 import numpy as np
-from scipy import ndimage
-from scipy.ndimage import morphology
 
 from heuristics.conditions import Condition
+from state_representation.analysis import label_regions, morphology
 
 
 class PlayerInBiggestRegionCondition(Condition):
@@ -21,23 +20,17 @@ class PlayerInBiggestRegionCondition(Condition):
         """Compute the size of all players regions and check if we are in the biggest one."""
         # close all 1 cell wide openings aka "articulating points"
         if self.opening_iterations:
-            cells = morphology.binary_opening(cells, iterations=self.opening_iterations)
+            cells = morphology(cells, "binary_opening", self.opening_iterations)
 
         players = [player] + opponents
 
-        # inverse map (mask occupied cells)
-        empty = cells == 0
-        # Clear cell we're in and for all active opponents
-        for p in players:
-            empty[p.y, p.x] = True
-
-        # compute distinct regions
-        labelled, _ = ndimage.label(empty)
+        # compute distinct regions, cell we're in and for all active opponents are cleared
+        labelled, sizes = label_regions(cells, players)
 
         # Get the region each player is in
         regions = np.array([labelled[p.y, p.x] for p in players])
         # Compute the sizes and divide by numbers of players in each region
-        region_sizes = np.array([np.sum(labelled == region) for region in regions])
+        region_sizes = sizes[regions]
 
         # Check if player region is the biggest one
         return region_sizes[0] == max(region_sizes)
@@ -1,22 +1,49 @@
 import numpy as np
 
 from heuristics.heuristic import Heuristic
+from state_representation.reachability import arrival_times
 
 
 class OpponentDistanceHeuristic(Heuristic):
     """Computes the distance sum to all players up to a threshold."""
 
-    def __init__(self, dist_threshold=16):
-        """Initialize OpponentDistanceHeuristic."""
+    def __init__(self, dist_threshold=16, speed_aware=False):
+        """Initialize OpponentDistanceHeuristic.
+
+        Args:
+            dist_threshold: Distances are clipped to this threshold
+            speed_aware: Use the earliest round, in which the player and an opponent could occupy the same cell, instead
+                of the manhattan distance. Respects speeds, jumps, turns and obstacles.
+        """
         self.dist_threshold = dist_threshold
+        self.speed_aware = speed_aware
 
     def score(self, cells, player, opponents, rounds, deadline):
         """Computes the distance to all players."""
+        if self.speed_aware:
+            meeting_time = self._meeting_time(cells, player, opponents, rounds, deadline)
+            return min(meeting_time, self.dist_threshold) / np.sum(cells.shape)
+
         min_opponent_dist = min(
             min(np.sum(np.abs(player.position - o.position)) for o in opponents if o.active), self.dist_threshold
         )
         return min_opponent_dist / np.sum(cells.shape)
 
+    def _meeting_time(self, cells, player, opponents, rounds, deadline=None):
+        """Earliest round, in which the player and any opponent could reach the same cell."""
+        own_times = arrival_times(cells, player, rounds, horizon=self.dist_threshold, deadline=deadline)
+        meeting_time = self.dist_threshold
+        for o in opponents:
+            if not o.active:
+                continue
+            times = arrival_times(cells, o, rounds, horizon=self.dist_threshold, deadline=deadline)
+            both = (own_times >= 0) & (times >= 0)
+            if np.any(both):
+                meeting_time = min(meeting_time, np.min(np.maximum(own_times, times)[both]))
+        return meeting_time
+
     def __str__(self):
         """Get readable representation."""
-        return f"OpponentDistanceHeuristic(dist_threshold={self.dist_threshold})"
+        return f"OpponentDistanceHeuristic(dist_threshold={self.dist_threshold}" + (
+            ", speed_aware=True)" if self.speed_aware else ")"
+        )
@@ -1,43 +1,65 @@
 import time
 
-from environments.simulator import Spe_edSimulator
+from environments import spe_ed
+from environments.bitboard import BitboardSimulator
 from heuristics.heuristic import Heuristic
+from heuristics.transposition_table import TranspositionTable
 
 # Reorder actions to hit early out condition as fast as possible
 # change_nothing first, as it's the most common action
 # turn_* before speed_up, as this leads to longer paths
 # slow_down before speed_up, as it terminates earlier.
-ordered_actions = ("change_nothing", "turn_left", "turn_right", "slow_down", "speed_up")
+ordered_actions = tuple(
+    spe_ed.action_codes[a] for a in ("change_nothing", "turn_left", "turn_right", "slow_down", "speed_up")
+)
 
 
 class PathLengthHeuristic(Heuristic):
     """Performs a random probe run and evaluates length of the path."""
 
-    def __init__(self, n_steps, time_limit=None):
+    def __init__(self, n_steps, time_limit=None, transposition_table_size=2**16):
         """Initialize PathLengthHeuristic.
 
         Args:
             n_steps: Number of steps to look into the future
-            expanded_node_limit: Threshold to prevent long execution times
+            time_limit: Threshold to prevent long execution times
+            transposition_table_size: Maximum number of remembered search results, pass `0` to disable.
+                The table is kept between calls, statistics are available via `transposition_table.hits/misses`.
         """
         self.n_steps = n_steps
         self.time_limit = time_limit
+        self.transposition_table = TranspositionTable(transposition_table_size) if transposition_table_size else None
 
     def score(self, cells, player, opponents, rounds, deadline):
         """Perform a DFS to seach the longest path reachable."""
         expanded = 0
+        timed_out = False
+        table = self.transposition_table
 
         if self.time_limit is not None:
             deadline = min(time.time() + self.time_limit, deadline)
 
         def _dfs(sim):
             """Depth-first search"""
-            nonlocal expanded
-
-            path_length = sim.rounds - rounds
-            if path_length >= self.n_steps or time.time() > deadline:  # Maximum search depth reached
-                return path_length  # Early out
-
+            nonlocal expanded, timed_out
+
+            depth = sim.rounds - rounds
+            if depth >= self.n_steps:  # Maximum search depth reached
+                return depth  # Early out
+            if time.time() > deadline:
+                timed_out = True
+                return depth  # Early out
+
+            # Table entries store the remaining path length and whether it is exact or just a lower bound
+            if table is not None:
+                key = sim.zobrist
+                entry = table.get(key)
+                if entry is not None:
+                    remaining, exact = entry
+                    if exact or depth + remaining >= self.n_steps:
+                        return min(depth + remaining, self.n_steps)
+
+            path_length = depth
             for action in ordered_actions:
                 sub_sim = sim.step([action])
                 if not sub_sim.player.active:  # Backtrack
@@ -45,16 +67,21 @@ class PathLengthHeuristic(Heuristic):
 
                 sub_path_length = _dfs(sub_sim)
                 if sub_path_length >= self.n_steps:  # Maximum search depth reached
-                    return sub_path_length  # Early out
+                    path_length = sub_path_length
+                    break  # Early out
 
                 if sub_path_length > path_length:
                     path_length = sub_path_length
 
             expanded += 1  # Count expanded nodes
 
+            # Results are only proven, if the search was not interrupted
+            if table is not None and not timed_out:
+                table.put(key, (path_length - depth, path_length < self.n_steps))
+
             return path_length
 
-        path_length = _dfs(Spe_edSimulator(cells, [player], rounds))
+        path_length = _dfs(BitboardSimulator(cells, [player], rounds))
 
         # return the board state score value
         return path_length / self.n_steps
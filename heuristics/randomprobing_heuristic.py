@@ -28,31 +28,39 @@ class RandomProbingHeuristic(Heuristic):
         """Perform one recursive probe run with random actions and returns the number of steps survived."""
 
         def perform_probe_run(env):
-            """Simulate the given environment for maximum of `n_steps` with valid random steps or
-            until the player cannot make a valid move, return the environment.
+            """Simulate the given environment in place for maximum of `n_steps` with valid random steps or
+            until the player cannot make a valid move, return the number of performed steps.
             """
+            n_steps = 0
             for _ in range(self.n_steps):
                 dead_end = True
-                for action in self.rng.permutation(spe_ed.actions):
-                    env = env.step([action])
+                for action in self.rng.permutation(len(spe_ed.actions)):
+                    env.apply([action])
                     if env.players[0].active:
                         # We survive, go to next step
                         dead_end = False
+                        n_steps += 1
                         break
                     else:
-                        env = env.undo()  # We die, try alternative action
+                        env.revert()  # We die, try alternative action
                 if dead_end:  # No way out
                     break
-            return env
+            return n_steps
+
+        # All probes share a single board, which is restored after each probe run
+        env = Spe_edSimulator(cells.copy(), [player.copy()], rounds)
 
         score = 0
         for _ in range(self.n_probes):
             # perform a single probe run
-            env = perform_probe_run(Spe_edSimulator(cells, [player], rounds))
+            n_steps = perform_probe_run(env)
             probe_score = self.heuristic.score(env.cells, env.players[0], opponents, env.rounds, deadline)
             # remember only the score of the best probe run
             score = max(probe_score, score)
 
+            for _ in range(n_steps):
+                env.revert()
+
             if time.time() >= deadline:  # Check deadline
                 break
 
@@ -1,8 +1,7 @@
 import numpy as np
-from scipy import ndimage
-from scipy.ndimage import morphology
 
 from heuristics.heuristic import Heuristic
+from state_representation.analysis import label_regions, morphology
 
 
 class RegionHeuristic(Heuristic):
@@ -31,25 +30,19 @@ class RegionHeuristic(Heuristic):
         """Compute the relative size of the region we're in."""
         # close all 1 cell wide openings aka "articulating points"
         if self.closing_iterations > 0:
-            cells = morphology.binary_closing(cells, iterations=self.closing_iterations, border_value=1)
+            cells = morphology(cells, "binary_closing", self.closing_iterations, border_value=1)
         if self.opening_iterations > 0:
-            cells = morphology.binary_opening(cells, iterations=self.opening_iterations)
+            cells = morphology(cells, "binary_opening", self.opening_iterations)
 
         players = [player] + opponents
 
-        # inverse map (mask occupied cells)
-        empty = cells == 0
-        # Clear cell we're in and for all active opponents
-        for p in players:
-            empty[p.y, p.x] = True
-
-        # compute distinct regions
-        labelled, _ = ndimage.label(empty)
+        # compute distinct regions, cell we're in and for all active opponents are cleared
+        labelled, sizes = label_regions(cells, players)
 
         # Get the region each player is in
         regions = np.array([labelled[p.y, p.x] for p in players])
         # Compute the sizes and divide by numbers of players in each region
-        region_sizes = np.array([np.sum(labelled == region) / np.sum(regions == region) for region in regions])
+        region_sizes = np.array([sizes[region] / np.sum(regions == region) for region in regions])
 
         # Normalize by grid size
         region_sizes /= np.prod(cells.shape)
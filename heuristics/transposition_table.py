@@ -0,0 +1,51 @@
+from collections import OrderedDict
+
+
+class TranspositionTable:
+    """Bounded mapping from state hashes to search results with least recently used eviction.
+
+    Counts hits and misses of all lookups.
+    """
+
+    def __init__(self, max_size):
+        """Initialize TranspositionTable.
+
+        Args:
+            max_size: Maximum number of stored entries
+        """
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Get the entry of `key` or `None` if not present."""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        """Store an entry and evict the least recently used entry if necessary."""
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries and reset the counters."""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self):
+        """Ratio of successful lookups."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0
+
+    def __len__(self):
+        return len(self.entries)
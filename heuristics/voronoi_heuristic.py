@@ -1,15 +1,15 @@
-import time
-
 import numpy as np
-from scipy.ndimage import morphology
 
 from heuristics.heuristic import Heuristic
+from state_representation import analysis
+from state_representation.reachability import arrival_times
+from state_representation.voronoi import geodesic_voronoi
 
 
 class VoronoiHeuristic(Heuristic):
     """Tries to maximize the area that can be reached by the agent before the opponents."""
 
-    def __init__(self, max_steps=40, opening_iterations=0, minimize_opponents=False):
+    def __init__(self, max_steps=40, opening_iterations=0, minimize_opponents=False, speed_aware=False):
         """Initialize VoronoiHeuristic.
 
         Args:
@@ -17,39 +17,33 @@ class VoronoiHeuristic(Heuristic):
             opening_iterations: number of performed opening operations on the cell state before the computation
                 of the voronoi diagram to account for jumps. default: 0
             minimize_opponents: Incentives reducing regions of opponents
+            speed_aware: Assign cells to the player with the earliest arrival time, which respects speeds, jumps and
+                turns. Then `max_steps` is the number of rounds to look ahead and no opening is performed.
         """
         self.max_steps = max_steps
         self.opening_iterations = opening_iterations
         self.minimize_opponents = minimize_opponents
+        self.speed_aware = speed_aware
 
     def score(self, cells, player, opponents, rounds, deadline):
-        """Computes an approximation of the geodesic voronoi diagram using binary dilation."""
+        """Computes an approximation of the geodesic voronoi diagram by expanding all players simultaneously."""
+        if self.speed_aware:
+            voronoi = self._speed_aware_voronoi(cells, (player, *opponents), rounds, deadline)
+            if self.minimize_opponents:
+                return 1 - (np.sum(voronoi[1:]) / np.prod(cells.shape))
+            return np.sum(voronoi[0]) / np.prod(cells.shape)
+
         unmodified_cells = cells
         # open all {self.opening_iterations} wide walls aka "articulating points" to account for jumps
         if self.opening_iterations:
             cells = np.pad(cells, (self.opening_iterations,))
-            cells = morphology.binary_opening(cells, iterations=self.opening_iterations)
+            cells = analysis.morphology(cells, "binary_opening", self.opening_iterations)
             cells = cells[
                 self.opening_iterations : -self.opening_iterations, self.opening_iterations : -self.opening_iterations
             ]
 
-        # initialize arrays, one binary map for each player
-        mask = cells == 0
-        voronoi = np.zeros((len(opponents) + 1, *cells.shape), dtype=bool)
-        for idx, p in enumerate((player, *opponents)):
-            mask[p.y, p.x] = True  # reset player position to allow dilation
-            voronoi[idx, p.y, p.x] = True
-
         # geodesic voronoi cell computation
-        for _ in range(self.max_steps):
-            for i in range(len(voronoi)):
-                voronoi[i] = morphology.binary_dilation(voronoi[i], mask=mask)  # expand cell by one step
-            xor = np.sum(voronoi, axis=0) > 1  # compute overlaps for every cell
-            mask[xor] = 0  # mask out all overlaps
-            voronoi[:, xor] = 0  # reset all overlapping cell borders
-
-            if time.time() >= deadline:  # Check deadline
-                break
+        voronoi, _ = geodesic_voronoi(cells, (player, *opponents), self.max_steps, deadline)
 
         if self.opening_iterations:
             voronoi[:, unmodified_cells > 0] = 0  # reset all occupied cells
@@ -62,6 +56,16 @@ class VoronoiHeuristic(Heuristic):
             # return the relative size of the voronoi cell for the controlled player
             return np.sum(voronoi[0]) / np.prod(cells.shape)
 
+    def _speed_aware_voronoi(self, cells, players, rounds, deadline=None):
+        """Assign each cell to the player, which can reach it strictly first."""
+        times = np.array(
+            [arrival_times(cells, p, rounds, horizon=self.max_steps, deadline=deadline) for p in players], dtype=float
+        )
+        times[times < 0] = np.inf  # Not reachable
+        earliest = np.min(times, axis=0)
+        first = times == earliest
+        return first & (np.sum(first, axis=0) == 1) & (earliest < np.inf)
+
     def __str__(self):
         """Get readable representation."""
         return (
@@ -69,5 +73,6 @@ class VoronoiHeuristic(Heuristic):
             + f"max_steps={self.max_steps}, "
             + f"opening_iterations={self.opening_iterations}, "
             + f"minimize_opponents={self.minimize_opponents}, "
+            + ("speed_aware=True, " if self.speed_aware else "")
             + ")"
         )
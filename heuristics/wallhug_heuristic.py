@@ -1,3 +1,6 @@
+import numpy as np
+
+from environments.spe_ed import Cells
 from heuristics.heuristic import Heuristic
 
 
@@ -7,15 +10,14 @@ class WallhugHeuristic(Heuristic):
     def score(self, cells, player, opponents, rounds, deadline):
         """Return the constant number."""
         # directions - relative to player direction
-        forward = player.direction
-        left = player.direction.turn_left()
-        right = player.direction.turn_right()
-
-        def is_occ(pos):
-            """is_free relative to player position."""
-            return not cells.is_free(player.position + pos)
+        forward = player.direction.cartesian
+        left = player.direction.turn_left().cartesian
+        right = player.direction.turn_right().cartesian
 
-        return (is_occ(forward) + is_occ(left) + is_occ(right)) / 3
+        # Occupied cells relative to player position
+        if not isinstance(cells, Cells):
+            cells = Cells(cells)
+        return np.sum(~cells.are_free([forward, left, right], origin=(player.x, player.y))) / 3
 
     def __str__(self):
         """Get readable representation."""
@@ -9,11 +9,12 @@ import matplotlib.pyplot as plt
 import numpy as np
 from tqdm import tqdm
 
-from environments import SimulatedSpe_edEnv, WebsocketEnv
+from environments import SimulatedSpe_edEnv, WebsocketEnv, game_log
 from environments.logging import CloudUploader, Spe_edLogger
 from environments.spe_ed import SavedGame
 from heuristics import PathLengthHeuristic
-from policies import HeuristicPolicy, load_named_policy
+from policies import HeuristicPolicy, PonderingPolicy, load_named_policy
+from state_representation import analysis
 from tournament.tournament import run_tournament
 
 # Set up logging
@@ -39,32 +40,45 @@ def play(env, pol, show=False, render_file=None, fps=10, logger=None, silent=Tru
         writer.send(
             env.render(mode="rgb_array", screen_width=window_size[0], screen_height=window_size[1]).copy(order="C")
         )
-    if logger is not None:  # Log initial state
-        states = [env.game_state()]
+    if logger is not None:  # Log initial state, streamed to avoid keeping all boards as nested lists
+        recorder = logger.recorder()
         time_limits = []
 
-    done = False
-    with tqdm(disable=silent) as pbar:
-        while not done:
-            action = pol.act(*obs)
-            obs, reward, done, _ = env.step(action)
-
-            if show and not env.render(screen_width=window_size[0], screen_height=window_size[1]):
-                return
-            if render_file is not None:
-                writer.send(
-                    env.render(mode="rgb_array", screen_width=window_size[0], screen_height=window_size[1]).copy(
-                        order="C"
+    done, completed = False, False
+    try:
+        if logger is not None:
+            recorder.record(env.game_state(include_cells=False), env.cells)
+        with tqdm(disable=silent) as pbar:
+            while not done:
+                action = pol.act(*obs)
+                # Boards of previous turns are not needed anymore, cleared after pondering was stopped by `act`
+                analysis.cache.clear()
+                if isinstance(pol, PonderingPolicy):  # Think about the next state while waiting
+                    pol.ponder(*obs[:4], action)
+                obs, reward, done, _ = env.step(action)
+
+                if show and not env.render(screen_width=window_size[0], screen_height=window_size[1]):
+                    return
+                if render_file is not None:
+                    writer.send(
+                        env.render(mode="rgb_array", screen_width=window_size[0], screen_height=window_size[1]).copy(
+                            order="C"
+                        )
                     )
-                )
-            if logger is not None:
-                states.append(env.game_state())
-                if isinstance(env, WebsocketEnv):
-                    time_limits.append(env.time_limit)
-            pbar.update()
+                if logger is not None:
+                    recorder.record(env.game_state(include_cells=False), env.cells)
+                    if isinstance(env, WebsocketEnv):
+                        time_limits.append(env.time_limit)
+                pbar.update()
+        completed = True
+    finally:
+        if isinstance(pol, PonderingPolicy):  # Also stop pondering, if the game was aborted
+            pol.stop()
+        if logger is not None and not completed:
+            logger.abort(recorder)
 
     if logger is not None:
-        logger.log(states, time_limits)
+        logger.finish(recorder, time_limits)
     if render_file is not None:
         writer.close()
     if show:
@@ -185,7 +199,7 @@ def render_logfile(log_file, fps=10, silent=False, window_size=default_window_si
             "attached_pic",
             "-v",
             "warning",
-            str(log_file.parent / (log_file.name[:-5] + ".mp4")),
+            str(log_file.parent / (log_file.stem + ".mp4")),
         ]
     )
 
@@ -200,7 +214,7 @@ if __name__ == "__main__":
     parser.add_argument(
         "mode",
         nargs="?",
-        choices=["play", "replay", "render_logdir", "plot", "tournament", "tournament-plot"],
+        choices=["play", "replay", "render_logdir", "plot", "tournament", "tournament-plot", "sequences"],
         default="play",
     )
     parser.add_argument("--show", action="store_true", help="Display games using an updating matplotlib plot.")
@@ -212,6 +226,7 @@ if __name__ == "__main__":
     )
     parser.add_argument("--log-file", type=str, default=None, help="Path to a log file, used to load and replay games.")
     parser.add_argument("--log-dir", type=str, default=None, help="Directory for storing or retrieving logs.")
+    parser.add_argument("--date", type=str, default=None, help="Prefix of the log files to create sequences from.")
     parser.add_argument(
         "--t-config",
         type=str,
@@ -219,11 +234,13 @@ if __name__ == "__main__":
         help="Path of the tournament config file containing which settings to run.",
     )
     parser.add_argument("--upload", action="store_true", help="Upload generated log to cloud server.")
+    parser.add_argument("--compact-logs", action="store_true", help="Write logs in the compact binary format.")
     parser.add_argument("--fps", type=int, default=10, help="FPS for rendering.")
     parser.add_argument(
         "--cores", type=int, default=None, help="Number of cores for multiprocessing, default uses all."
     )
     parser.add_argument("--repeat", type=bool, default=False, help="Play endlessly.")
+    parser.add_argument("--ponder", action="store_true", help="Think about the next state while waiting for it.")
     args = parser.parse_args()
 
     if args.mode == "render_logdir":
@@ -234,9 +251,9 @@ if __name__ == "__main__":
 
         log_files = []
         for log_file in log_dir.iterdir():
-            if not log_file.name.endswith(".json"):
+            if log_file.suffix not in (".json", game_log.suffix):
                 continue
-            if (log_dir / (log_file.name[:-5] + ".mp4")).exists():
+            if (log_dir / (log_file.stem + ".mp4")).exists():
                 continue
             log_files.append(log_file)
 
@@ -253,7 +270,7 @@ if __name__ == "__main__":
 
         log_dir = Path(args.log_dir)
         run_tournament(args.show, log_dir, args.t_config, args.cores)
-        create_tournament_plots(log_dir, log_dir.parent)
+        create_tournament_plots(log_dir, log_dir.parent, args.cores)
     elif args.mode == "tournament-plot":
         from statistics import create_tournament_plots
 
@@ -262,7 +279,7 @@ if __name__ == "__main__":
             logging.error(f"{log_dir} is not a directory")
             quit(1)
 
-        create_tournament_plots(log_dir, log_dir.parent)
+        create_tournament_plots(log_dir, log_dir.parent, args.cores)
     elif args.mode == "plot":
         from statistics import create_plots
 
@@ -271,7 +288,16 @@ if __name__ == "__main__":
             logging.error(f"{log_dir} is not a directory")
             quit(1)
 
-        create_plots(log_dir, log_dir.parent / "statistics.csv")
+        create_plots(log_dir, log_dir.parent / "statistics.sqlite", args.cores)
+    elif args.mode == "sequences":
+        from datasets.sequences import create_sequences
+
+        log_dir = Path(args.log_dir)
+        if not log_dir.is_dir() or args.date is None:
+            logging.error(f"{log_dir} is not a directory or no --date was given")
+            quit(1)
+
+        create_sequences(log_dir, args.date, cores=args.cores)
     else:
         # Create logger
         if args.log_dir is not None:
@@ -285,7 +311,7 @@ if __name__ == "__main__":
                         remote_dir="logs/",
                     ).upload
                 )
-            logger = Spe_edLogger(args.log_dir, logger_callbacks)
+            logger = Spe_edLogger(args.log_dir, logger_callbacks, compact=args.compact_logs)
         else:
             logger = None
 
@@ -297,21 +323,24 @@ if __name__ == "__main__":
 
         # Create policy
         pol = load_named_policy("GarrukV3")
+        if args.ponder:
+            pol = PonderingPolicy(pol)
+
+        with pol:  # Release worker processes of the policy, when done
+            while True:
+                try:
+                    play(
+                        env,
+                        pol,
+                        show=args.show,
+                        render_file=args.render_file,
+                        fps=args.fps,
+                        logger=logger,
+                        silent=args.repeat,
+                    )
+                except Exception:
+                    logging.exception("Exception during play")
+                    time.sleep(60)  # Sleep for a bit and try again
 
-        while True:
-            try:
-                play(
-                    env,
-                    pol,
-                    show=args.show,
-                    render_file=args.render_file,
-                    fps=args.fps,
-                    logger=logger,
-                    silent=args.repeat,
-                )
-            except Exception:
-                logging.exception("Exception during play")
-                time.sleep(60)  # Sleep for a bit and try again
-
-            if not args.repeat:
-                break
+                if not args.repeat:
+                    break
@@ -6,6 +6,7 @@ from policies.heuristic_policy import HeuristicPolicy
 from policies.maximin_search import Maximin_SearchPolicy
 from policies.mazewalker_policy import MazeWalkerPolicy
 from policies.policy import Policy, load_named_policy
+from policies.pondering import PonderingPolicy
 from policies.random_policy import RandomPolicy
 from policies.scripted_policy import ScriptedPolicy
 from policies.spiral_policy import SpiralPolicy
@@ -23,4 +24,5 @@ __all__ = [
     "HeuristicPolicy",
     "EndgamePolicy",
     "ConditionalPolicy",
+    "PonderingPolicy",
 ]
@@ -5,27 +5,37 @@ from queue import PriorityQueue
 from environments import spe_ed
 from environments.simulator import Spe_edSimulator
 from policies.policy import Policy
-from state_representation import occupancy_map
+from state_representation import occupancy_maps
 
 
 class ActionSearchPolicy(Policy):
     """Policy that performs a greedy search for that action that will maximize the heuristic."""
 
-    def __init__(self, heuristic, depth_limit=6, expanded_node_limit=100, occupancy_map_depth=0):
+    def __init__(
+        self, heuristic, depth_limit=6, expanded_node_limit=100, occupancy_map_depth=0, iterative_deepening=False
+    ):
         """Initialize ActionSearchPolicy.
 
         Args:
             heuristic: `Heuristic` that will be evaluated after every step.
+            iterative_deepening: Complete the search depth by depth until the deadline, instead of a greedy best-first
+                search. Then `expanded_node_limit` bounds the number of expanded nodes per depth.
         """
         self.heuristic = heuristic
         self.depth_limit = depth_limit
         self.expanded_node_limit = expanded_node_limit
         self.occupancy_map_depth = occupancy_map_depth
+        self.iterative_deepening = iterative_deepening
 
     def act(self, cells, player, opponents, rounds, deadline):
         """Search action sequence based on heuristic scores."""
+        if self.iterative_deepening:
+            return self._act_iterative_deepening(cells, player, opponents, rounds, deadline)
+
         if self.occupancy_map_depth > 0:
-            occ_maps = [occupancy_map(cells, opponents, rounds, depth=d + 1) for d in range(self.occupancy_map_depth)]
+            occ_maps = occupancy_maps(cells, opponents, rounds, depth=self.occupancy_map_depth)
+        else:
+            occ_maps = None
 
         states = PriorityQueue()
         states.put((0, [], Spe_edSimulator(cells, [player], rounds), 1))  # Current state as inital
@@ -35,7 +45,7 @@ class ActionSearchPolicy(Policy):
         while not states.empty() and expanded < self.expanded_node_limit and time.time() < deadline:
             _, prev_actions, prev_state, prev_freeness = states.get()
 
-            for action in spe_ed.actions:
+            for action in range(len(spe_ed.actions)):  # By code
                 state = prev_state.step([action])
                 if not state.player.active:
                     continue
@@ -43,13 +53,7 @@ class ActionSearchPolicy(Policy):
                 actions = prev_actions + [action]
 
                 # Evaluate heuristic
-                score = self.heuristic.score(state.cells, state.player, opponents, state.rounds, time.time() + 0.1)
-                if self.occupancy_map_depth > 0:
-                    occ_map = occ_maps[min(state.rounds - rounds, self.occupancy_map_depth) - 1]
-                    freeness = prev_freeness * prod(1 - occ_map[cell[1], cell[0]] for cell in state.changed)
-                    score *= freeness
-                else:
-                    freeness = 1
+                score, freeness = self._evaluate(state, prev_freeness, occ_maps, rounds, opponents, deadline)
 
                 actions_scores.append((actions, score))
                 if len(actions) < self.depth_limit:  # Search depth
@@ -66,7 +70,73 @@ class ActionSearchPolicy(Policy):
         # Select action which leads to maximal score
         best_action = max(actions_scores, key=lambda x: x[1])[0][0]
 
-        return best_action
+        return spe_ed.actions[best_action]
+
+    def _evaluate(self, state, prev_freeness, occ_maps, rounds, opponents, deadline):
+        """Score a state, weighted by the probability that all its newly occupied cells are free."""
+        sub_deadline = min(time.time() + 0.1, deadline)
+        score = self.heuristic.score(state.cells, state.player, opponents, state.rounds, sub_deadline)
+        if self.occupancy_map_depth > 0:
+            occ_map = occ_maps[min(state.rounds - rounds, self.occupancy_map_depth) - 1]
+            freeness = prev_freeness * prod(1 - occ_map[cell[1], cell[0]] for cell in state.changed)
+            return score * freeness, freeness
+        return score, 1
+
+    def _act_iterative_deepening(self, cells, player, opponents, rounds, deadline):
+        """Complete the search depth by depth and select the best action of the last completed depth.
+
+        The frontier of the previous depth is reused and expanded in order of its scores. A depth is only started,
+        if it is expected to complete before the deadline, based on the time per evaluation of the previous depth.
+        If the deadline passes during the first depth, the best action evaluated so far is selected.
+        """
+        if self.occupancy_map_depth > 0:
+            occ_maps = occupancy_maps(cells, opponents, rounds, depth=self.occupancy_map_depth)
+        else:
+            occ_maps = None
+
+        # Nodes are (score, first action, state, freeness), sorted by descending score
+        frontier = [(0, None, Spe_edSimulator(cells, [player], rounds), 1)]
+        best_action = None  # Best action of the last completed depth
+        time_per_node = 0
+        for depth in range(self.depth_limit):
+            # Predict whether the next depth completes in time
+            n_nodes = len(spe_ed.actions) * min(len(frontier), self.expanded_node_limit)
+            start = time.time()
+            if start + n_nodes * time_per_node > deadline:
+                break
+
+            layer, completed = [], True
+            for _, first_action, prev_state, prev_freeness in frontier[: self.expanded_node_limit]:
+                for action in range(len(spe_ed.actions)):  # By code
+                    if time.time() >= deadline:
+                        completed = False
+                        break
+
+                    state = prev_state.step([action])
+                    if not state.player.active:
+                        continue
+
+                    score, freeness = self._evaluate(state, prev_freeness, occ_maps, rounds, opponents, deadline)
+                    layer.append((score, action if first_action is None else first_action, state, freeness))
+                if not completed:
+                    break
+
+            if not completed:  # Discard incomplete depth, unless no depth was completed
+                if best_action is None and len(layer) > 0:
+                    best_action = spe_ed.actions[max(layer, key=lambda node: node[0])[1]]
+                break
+
+            if len(layer) == 0:  # No surviving action sequences, keep result of previous depth
+                break
+
+            time_per_node = (time.time() - start) / n_nodes
+            frontier = sorted(layer, key=lambda node: node[0], reverse=True)
+            best_action = spe_ed.actions[frontier[0][1]]
+
+            if len(set(node[1] for node in frontier)) == 1:  # Only one possible root action
+                break
+
+        return "change_nothing" if best_action is None else best_action
 
     def __repr__(self):
         """Get exact representation."""
@@ -74,5 +144,6 @@ class ActionSearchPolicy(Policy):
             f"ActionSearchPolicy(heuristic={self.heuristic}, "
             + f"depth_limit={self.depth_limit}, "
             + f"expanded_node_limit={self.expanded_node_limit}, "
-            + f"occupancy_map_depth={self.occupancy_map_depth})"
+            + f"occupancy_map_depth={self.occupancy_map_depth}"
+            + (", iterative_deepening=True)" if self.iterative_deepening else ")")
         )
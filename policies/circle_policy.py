@@ -10,19 +10,18 @@ class CirclePolicy(Policy):
     def act(self, cells, player, opponents, rounds, deadline):
         """Choose action."""
         # directions - relative to player direction
-        forward = player.direction
-        left = player.direction.turn_left()
-        right = player.direction.turn_right()
+        forward = player.direction.cartesian
+        left = player.direction.turn_left().cartesian
+        right = player.direction.turn_right().cartesian
 
-        # if_free - relative to player position
-        def is_free(pos):
-            return cells.is_free(player.position + pos)
+        # is_free relative to player position
+        free_forward, free_left, free_right = cells.are_free([forward, left, right], origin=(player.x, player.y))
 
-        if is_free(right):
+        if free_right:
             return "turn_right"
-        elif is_free(forward):
+        elif free_forward:
             return "change_nothing"
-        elif is_free(left):
+        elif free_left:
             return "turn_left"
 
         return "change_nothing"  # We're surrounded
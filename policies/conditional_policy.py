@@ -43,6 +43,11 @@ class ConditionalPolicy(Policy):
                 return policy.act(cells, player, opponents, rounds, deadline)
         return self.policies[-1].act(cells, player, opponents, rounds, deadline)
 
+    def close(self):
+        """Release resources of all policies."""
+        for policy in self.policies:
+            policy.close()
+
     def __repr__(self):
         """Get exact representation."""
         return (
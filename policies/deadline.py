@@ -0,0 +1,61 @@
+import threading
+
+
+class Deadline(float):
+    """Deadline that can be cancelled from another thread.
+
+    Behaves like a float timestamp. After `cancel` was called, all comparisons and arithmetic act as if the deadline
+    already passed infinitely long ago. Deadlines derived by arithmetic before the cancellation are plain floats.
+    """
+
+    def __new__(cls, value, cancelled=None):
+        """Create a deadline.
+
+        Args:
+            value: Timestamp of the deadline
+            cancelled: Event, which cancels the deadline when set, e.g. a `multiprocessing.Event` shared with the
+                process, which cancels it. A new event is created if `None`.
+        """
+        deadline = float.__new__(cls, value)
+        deadline._cancelled = threading.Event() if cancelled is None else cancelled
+        return deadline
+
+    def cancel(self):
+        """Let the deadline pass immediately."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        """Whether the deadline was cancelled."""
+        return self._cancelled.is_set()
+
+    @property
+    def value(self):
+        """Effective timestamp of this deadline."""
+        return float("-inf") if self._cancelled.is_set() else float(self)
+
+    def __lt__(self, other):
+        return self.value < other
+
+    def __le__(self, other):
+        return self.value <= other
+
+    def __gt__(self, other):
+        return self.value > other
+
+    def __ge__(self, other):
+        return self.value >= other
+
+    def __add__(self, other):
+        return self.value + other
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self.value - other
+
+    def __rsub__(self, other):
+        return other - self.value
+
+    def __repr__(self):
+        return f"Deadline({float(self)}{', cancelled' if self.cancelled else ''})"
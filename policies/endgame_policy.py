@@ -1,13 +1,12 @@
 import time
 
 import numpy as np
-from scipy import ndimage
-from scipy.ndimage import morphology
 
 from environments import spe_ed
 from environments.simulator import Spe_edSimulator
 from heuristics import PathLengthHeuristic
 from policies.policy import Policy
+from state_representation.analysis import label_regions, morphology
 
 
 def applyMorphology(cells, closing=0, opening=0, erosion=0, dilation=0):
@@ -22,13 +21,13 @@ def applyMorphology(cells, closing=0, opening=0, erosion=0, dilation=0):
         cells = np.pad(cells, (iterations,))
         # perform morphological operations/iterations
         if closing:
-            cells = morphology.binary_closing(cells, iterations=closing)
+            cells = morphology(cells, "binary_closing", closing)
         if opening:
-            cells = morphology.binary_opening(cells, iterations=opening)
+            cells = morphology(cells, "binary_opening", opening)
         if erosion:
-            cells = morphology.binary_erosion(cells, iterations=erosion)
+            cells = morphology(cells, "binary_erosion", erosion)
         if dilation:
-            cells = morphology.binary_dilation(cells, iterations=dilation)
+            cells = morphology(cells, "binary_dilation", dilation)
         # remove padding
         cells = cells[iterations:-iterations, iterations:-iterations]
     return cells
@@ -39,33 +38,28 @@ def labelCells(cells, players):
 
     Player positions are masked to belong to a region.
     """
-    # inverse map (mask occupied cells)
-    empty_cells = cells == 0
-    # Clear cell for all players
-    for p in players:
-        empty_cells[p.y, p.x] = True
-    # compute distinct regions
-    labelled_cells, _ = ndimage.label(empty_cells)
+    labelled_cells, _ = label_regions(cells, players)
     return labelled_cells
 
 
 def computeRegionSize(cells, players):
-    """Computes the size of the region the controlled player is in."""
-    labelled_cells = labelCells(cells, players)
-    # Get the region we're in and compute its size
+    """Computes the size of the region the controlled player is in.
+
+    `tiebreakerFunc` looks the size up in the `RegionTracker` of the simulator instead, if no morphology is applied.
+    """
+    labelled_cells, sizes = label_regions(cells, players)
+    # Get the region we're in and its size
     region_label = labelled_cells[players[0].y, players[0].x]
-    player_region_size = np.sum(labelled_cells == region_label)
-    return player_region_size
+    return sizes[region_label]
 
 
 def computeRegionNumber(cells, players):
     """Computes the number of unique regions."""
     # inverse map (mask occupied cells)
     cells = np.pad(cells, (1,))
-    empty_cells = cells == 0
     # compute distinct regions
-    _, num_cells = ndimage.label(empty_cells)
-    return num_cells
+    _, sizes = label_regions(cells)
+    return len(sizes) - 1
 
 
 def computeOccupiedCells(cells, players):
@@ -83,7 +77,7 @@ def tiebreakerFunc(env, remaining_actions, score_func=computeRegionSize, eval_fu
     """A general tiebreaker function to decide given an environment which actions are preferable and should be executed.
 
     Args:
-        env: The current game state given in `Spe_edSimulator`
+        env: The current game state given in `Spe_edSimulator`, steps are applied and reverted in place
         remaining_actions: A list of actions to choose from.
         score_func: A function, which accepts 'cells' and 'players' and returns a scalar value.
         eval_func: accepts either `max` or `min` to decide, whether prefer a lower or higher score.
@@ -103,12 +97,19 @@ def tiebreakerFunc(env, remaining_actions, score_func=computeRegionSize, eval_fu
     else:
         print("ERROR: function not handled")
 
+    track_regions = score_func is computeRegionSize and not morph_kwargs
+    if track_regions:
+        env.regions  # Create region tracker before applying steps
+
     for action in scores:
-        env = env.step([action])
+        env.apply([spe_ed.action_codes[action]])
         if env.players[0].active:
-            cells = applyMorphology(env.cells, **morph_kwargs)
-            scores[action] = score_func(cells, env.players)
-        env = env.undo()
+            if track_regions:  # Updated incrementally
+                scores[action] = env.regions.size(env.players[0].x, env.players[0].y)
+            else:
+                cells = applyMorphology(env.cells, **morph_kwargs)
+                scores[action] = score_func(cells, env.players)
+        env.revert()
 
     score_list = list(scores.values())
     remaining_actions = [k for k, v in scores.items() if v == eval_func(score_list)]
@@ -133,7 +134,7 @@ class EndgamePolicy(Policy):
 
     def act(self, cells, player, opponents, rounds, deadline):
         """Choose action."""
-        env = Spe_edSimulator(cells, [player], rounds)
+        env = Spe_edSimulator(cells.copy(), [player.copy()], rounds)
         remaining_actions = self.actions
 
         # bigger region is always better
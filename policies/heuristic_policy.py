@@ -1,12 +1,59 @@
+import logging
+import multiprocessing as mp
+import threading
 import time
+import weakref
 from math import prod
 
 import numpy as np
 
-from environments import spe_ed
+from environments import shared_board, spe_ed
+from environments.shared_board import SharedBoardPool
 from environments.simulator import Spe_edSimulator
+from policies.deadline import Deadline
 from policies.policy import Policy
-from state_representation import occupancy_map
+from state_representation import occupancy_maps
+
+_result_margin = 0.1  # Seconds to wait for results of the workers after the deadline
+_worker_heuristic = None  # Heuristic of a worker process
+_worker_cancelled = None  # Event of a worker process, set when the deadline of the current tasks is cancelled
+
+
+def _init_worker(heuristic, cancelled):
+    """Remember the heuristic and the cancellation event once per worker, instead of sending them with each task."""
+    global _worker_heuristic, _worker_cancelled
+    _worker_heuristic = heuristic
+    _worker_cancelled = cancelled
+    shared_board.detach_at_exit()
+
+
+def _close_pool(pool, boards):
+    """Let the workers exit and free the shared memory, workers which are stuck for a second are terminated."""
+    pool.close()
+    joiner = threading.Thread(target=pool.join, daemon=True)
+    joiner.start()
+    joiner.join(timeout=1)
+    pool.terminate()
+    boards.close()
+
+
+def _evaluate_action(heuristic, cells, player, opponents, rounds, action, deadline):
+    """Perform an action and evaluate the heuristic.
+
+    Returns:
+        Whether the player survived, the score and the newly occupied cells
+    """
+    next_state = Spe_edSimulator(cells, [player], rounds).step([spe_ed.action_codes[action]])
+    if not next_state.player.active:
+        return False, 0, []
+    score = heuristic.score(next_state.cells, next_state.player, opponents, next_state.rounds, deadline)
+    return True, score, [(int(x), int(y)) for x, y in next_state.changed]
+
+
+def _score_action(board, player, opponents, rounds, action, deadline):
+    """Evaluate an action on a board in shared memory in a worker process, see `_evaluate_action`."""
+    deadline = Deadline(deadline, _worker_cancelled)
+    return _evaluate_action(_worker_heuristic, board.cells(), player, opponents, rounds, action, deadline)
 
 
 class HeuristicPolicy(Policy):
@@ -15,28 +62,79 @@ class HeuristicPolicy(Policy):
     A single action is performed in every valid direction and evaluated by the given metric.
     """
 
-    def __init__(self, heuristic, occupancy_map_depth=0, actions=None):
+    def __init__(self, heuristic, occupancy_map_depth=0, actions=None, n_workers=None):
         """Initialize HeuristicPolicy.
 
         Args:
             heuristic: `Heuristic` that will be evaluated after one action of the player was performed.
             occupancy_map_depth: defines the depth of the occupoancy map. If > 0, uses it to weight scores.
             actions: considers only given actions, if `None` uses all given action.
+            n_workers: If > 0, actions are evaluated in parallel on a pool of worker processes, each with the full
+                time until the deadline. The pool is started immediately and kept alive until the policy is closed or
+                garbage collected.
         """
         self.heuristic = heuristic
         self.occupancy_map_depth = occupancy_map_depth
         self.actions = spe_ed.actions if actions is None else actions
+        self.n_workers = n_workers
+
+        self._pool = None
+        self._boards = None
+        self._cancelled = None
+        self._finalizer = None
+        if self.n_workers:
+            self._get_pool()
+
+    def _get_pool(self):
+        """Get the worker pool, start it if necessary.
+
+        Returns `None` inside of daemonic processes (e.g. tournament workers), which cannot have child processes.
+        """
+        if self._pool is None and not mp.current_process().daemon:
+            self._boards = SharedBoardPool(1)  # Before forking, such that workers share the resource tracker
+            self._cancelled = mp.Event()
+            self._pool = mp.Pool(self.n_workers, initializer=_init_worker, initargs=(self.heuristic, self._cancelled))
+            # Also clean up, if the policy is not closed explicitly
+            self._finalizer = weakref.finalize(self, _close_pool, self._pool, self._boards)
+        return self._pool
+
+    def close(self):
+        """Terminate the worker pool."""
+        if self._finalizer is not None:
+            self._finalizer()
+            self._pool = None
+            self._boards = None
+            self._cancelled = None
+            self._finalizer = None
+
+    def __getstate__(self):
+        """Exclude the worker pool from pickling."""
+        state = self.__dict__.copy()
+        for key in ("_pool", "_boards", "_cancelled", "_finalizer"):
+            state[key] = None
+        return state
 
     def act(self, cells, player, opponents, rounds, deadline):
         """Chooses action based on weighted heuristic scores."""
         scores = np.zeros(len(self.actions), dtype=np.float32)
         if self.occupancy_map_depth > 0:  # Only compute occupancy if required
-            occ_map = occupancy_map(cells, opponents, rounds, self.occupancy_map_depth)
+            occ_map = occupancy_maps(cells, opponents, rounds, self.occupancy_map_depth)[-1]
+
+        if self.n_workers and self._get_pool() is not None:
+            for a, (active, score, changed) in enumerate(
+                self._score_parallel(cells, player, opponents, rounds, deadline)
+            ):
+                if active:
+                    scores[a] = score
+                    if self.occupancy_map_depth > 0:  # Factor in occupancy of newly occupied cells
+                        scores[a] *= prod(1 - occ_map[y, x] for x, y in changed)
+            return self.actions[np.argmax(scores)]
+
         cur_state = Spe_edSimulator(cells, [player], rounds)
 
         for a, action in enumerate(self.actions):
             # perform a single action
-            next_state = cur_state.step([action])
+            next_state = cur_state.step([spe_ed.action_codes[action]])
             # evaluate the heuristic, if the player is active
             if next_state.player.active:
                 sub_deadline = time.time() + (deadline - time.time()) / len(self.actions)
@@ -49,6 +147,42 @@ class HeuristicPolicy(Policy):
         # select action with the highest score
         return self.actions[np.argmax(scores)]
 
+    def _score_parallel(self, cells, player, opponents, rounds, deadline):
+        """Evaluate all actions on the worker pool, the board is passed via shared memory.
+
+        Cancellation of a `Deadline` is forwarded to the workers by a shared event. Actions without a result shortly
+        after the deadline, e.g. of a stuck worker, are evaluated in this process instead and the pool is restarted.
+        """
+        board = self._boards.put(cells)
+        try:
+            self._cancelled.clear()
+            results = [
+                self._pool.apply_async(_score_action, (board, player, opponents, rounds, action, float(deadline)))
+                for action in self.actions
+            ]
+            timeout = float(deadline) + _result_margin
+            for result in results:
+                while not result.ready() and time.time() < timeout:
+                    if isinstance(deadline, Deadline) and deadline.cancelled and not self._cancelled.is_set():
+                        self._cancelled.set()  # Let the workers return early
+                        timeout = min(timeout, time.time() + _result_margin)
+                    result.wait(0.01)
+        finally:
+            self._boards.release(board)
+
+        scores, missing = [], False
+        for action, result in zip(self.actions, results):
+            if result.ready():
+                scores.append(result.get())
+            else:
+                missing = True
+                scores.append(_evaluate_action(self.heuristic, cells, player, opponents, rounds, action, deadline))
+        if missing:
+            logging.warning("HeuristicPolicy workers missed the deadline, restarting the pool")
+            self._pool.terminate()  # Stuck workers do not exit by themselves
+            self.close()  # Recreated by the next turn
+        return scores
+
     def __repr__(self):
         """Get exact representation."""
         return (
@@ -56,5 +190,6 @@ class HeuristicPolicy(Policy):
             + f"heuristic={self.heuristic}, "
             + f"occupancy_map_depth={self.occupancy_map_depth}, "
             + f"actions={self.actions}, "
+            + (f"n_workers={self.n_workers}, " if self.n_workers else "")
             + ")"
         )
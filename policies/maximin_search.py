@@ -39,7 +39,7 @@ class Maximin_SearchPolicy(Policy):
                 continue
 
             for action in action_selection:
-                state = prev_state.step([action])
+                state = prev_state.step([spe_ed.action_codes[action]])
                 if not state.player.active:
                     continue
 
@@ -13,25 +13,23 @@ class MazeWalkerPolicy(Policy):
 
     def act(self, cells, player, opponents, rounds, deadline):
         """Choose action."""
-
-        def is_free(pos):
-            """is_free, but relative to player position."""
-            return cells.is_free(player.position + pos)
-
         # directions - relative to player direction
-        forward = player.direction
-        left = player.direction.turn_left()
-        right = player.direction.turn_right()
+        forward = player.direction.cartesian
+        left = player.direction.turn_left().cartesian
+        right = player.direction.turn_right().cartesian
+
+        # is_free relative to player position
+        free_forward, free_left, free_right = cells.are_free([forward, left, right], origin=(player.x, player.y))
 
         if self.hit_wall:  # follow the wall
-            if is_free(left):
+            if free_left:
                 return "turn_left"
-            elif is_free(forward):
+            elif free_forward:
                 return "change_nothing"
-            elif is_free(right):
+            elif free_right:
                 return "turn_right"
         else:  # search for the wall
-            if is_free(forward):
+            if free_forward:
                 return "change_nothing"
             else:
                 self.hit_wall = True
@@ -11,7 +11,7 @@ class Policy(ABC):
         """Produce an action for a given game state.
 
         Args:
-            cells: binary ndarray of cell occupancies.
+            cells: binary ndarray of cell occupancies. Environments reuse it, copy it to keep it after the call.
             player: Controlled player
             opponents: List of other active players
             rounds: Number of this round. Starts with 1, thus `rounds % 6 == 0` indicates a jump.
@@ -33,6 +33,16 @@ class Policy(ABC):
         """
         return self.name if hasattr(self, "name") else repr(self)
 
+    def close(self):
+        """Release resources held by the policy, e.g. worker processes."""
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
 
 def load_named_policy(name):
     """Load a named policy by it's given name.
@@ -0,0 +1,105 @@
+import logging
+import threading
+import time
+
+from environments import zobrist
+from environments.simulator import Spe_edSimulator
+from policies.deadline import Deadline
+from policies.policy import Policy
+
+
+def state_key(cells, player, opponents, rounds):
+    """Zobrist hash of an observation, used to identify pondered states."""
+    return zobrist.state_hash(zobrist.board_hash(cells), [player] + list(opponents), rounds)
+
+
+class PonderingPolicy(Policy):
+    """Wrapper, which lets a policy think about the next state while waiting for the server.
+
+    After an action was selected, `ponder` predicts the next state, assuming all opponents perform `change_nothing`,
+    and searches it in a background thread. If the predicted state actually occurs, the pondering search continues
+    until it finishes or the deadline of the turn is reached, and its action is returned. Otherwise, pondering is
+    cancelled and the search is performed as usual, but may be warm-started by caches of the policy, e.g.
+    transposition tables of heuristics.
+    """
+
+    def __init__(self, policy, ponder_time_limit=None):
+        """Initialize PonderingPolicy.
+
+        Args:
+            policy: Wrapped policy
+            ponder_time_limit: Maximum time for pondering, uses the time limit of the last turn if `None`.
+        """
+        self.policy = policy
+        self.ponder_time_limit = ponder_time_limit
+
+        self.time_limit = 1  # Estimated time limit for each turn
+        self.hits = 0  # Number of correctly predicted states
+        self._thread = None
+        self._deadline = None
+        self._key = None
+        self._action = None
+
+    def act(self, cells, player, opponents, rounds, deadline):
+        """Return pondered action if the state was predicted, ask wrapped policy otherwise."""
+        self.time_limit = max(deadline - time.time(), 0)
+
+        if self._key is not None and self._key == state_key(cells, player, opponents, rounds):
+            if self._thread is not None:  # Let the search continue within the time of this turn
+                self._thread.join(timeout=max(deadline - time.time(), 0))
+            self.stop()
+            if self._action is not None:
+                self.hits += 1
+                return self._action
+        self.stop()
+        return self.policy.act(cells, player, opponents, rounds, deadline)
+
+    def ponder(self, cells, player, opponents, rounds, action):
+        """Start thinking about the most likely next state in the background.
+
+        Args:
+            cells, player, opponents, rounds: Current observation
+            action: Action, which was selected for the current observation
+        """
+        self.stop()
+
+        # Predict next state
+        sim = Spe_edSimulator(cells.copy(), [player.copy()] + [p.copy() for p in opponents], rounds)
+        sim = sim.step([action] + ["change_nothing"] * len(opponents))
+        if not sim.player.active:  # Nothing to think about
+            return
+        next_opponents = [p for p in sim.players[1:] if p.active]
+
+        time_limit = self.time_limit if self.ponder_time_limit is None else self.ponder_time_limit
+        self._deadline = Deadline(time.time() + time_limit)
+        self._key = state_key(sim.cells, sim.player, next_opponents, sim.rounds)
+        self._action = None
+        self._thread = threading.Thread(
+            target=self._ponder,
+            args=(sim.cells, sim.player, next_opponents, sim.rounds, self._deadline),
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _ponder(self, cells, player, opponents, rounds, deadline):
+        """Search the predicted state, a cancelled search returns the best action found so far."""
+        try:
+            self._action = self.policy.act(cells, player, opponents, rounds, deadline)
+        except Exception:
+            logging.exception("Exception during pondering")
+
+    def stop(self):
+        """Cancel pondering and wait for the background thread."""
+        if self._thread is not None:
+            self._deadline.cancel()
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """Stop pondering and release resources of the wrapped policy."""
+        self.stop()
+        self.policy.close()
+
+    def __repr__(self):
+        """Get exact representation."""
+        return f"PonderingPolicy(policy={self.policy!r}, ponder_time_limit={self.ponder_time_limit})"
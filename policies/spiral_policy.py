@@ -14,33 +14,34 @@ class SpiralPolicy(Policy):
     def act(self, cells, player, opponents, rounds, deadline):
         """Choose action."""
         # directions - relative to player direction
-        forward = player.direction
-        left = player.direction.turn_left()
-        right = player.direction.turn_right()
+        forward = player.direction.cartesian
+        left = player.direction.turn_left().cartesian
+        right = player.direction.turn_right().cartesian
 
-        def is_free(pos):
-            """is_free relative to player position."""
-            return cells.is_free(player.position + pos)
+        # is_free relative to player position
+        free_forward, free_forward2, free_left, free_right = cells.are_free(
+            [forward, 2 * forward, left, right], origin=(player.x, player.y)
+        )
 
         # check if we can create a spiral loop
-        if is_free(forward) and is_free(2 * forward):
+        if free_forward and free_forward2:
             return "change_nothing"
 
         if self.clockwise:
-            if is_free(right) and is_free(left) and not is_free(forward):
+            if free_right and free_left and not free_forward:
                 self.clockwise = False
                 return "turn_left"
-            if is_free(right):
+            if free_right:
                 return "turn_right"
-            elif is_free(left):
+            elif free_left:
                 return "turn_left"
         else:
-            if is_free(right) and is_free(left) and not is_free(forward):
+            if free_right and free_left and not free_forward:
                 self.clockwise = True
                 return "turn_right"
-            if is_free(left):
+            if free_left:
                 return "turn_left"
-            elif is_free(right):
+            elif free_right:
                 return "turn_right"
 
         return "change_nothing"  # We're surrounded
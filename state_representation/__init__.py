@@ -1,9 +1,14 @@
 from state_representation.abstraction import windowed_abstraction
-from state_representation.occupancy import occupancy_map
+from state_representation.occupancy import occupancy_map, occupancy_maps
+from state_representation.reachability import arrival_times
+from state_representation.voronoi import geodesic_voronoi
 from state_representation.window import padded_window
 
 __all__ = [
+    "arrival_times",
+    "geodesic_voronoi",
     "occupancy_map",
+    "occupancy_maps",
     "padded_window",
     "windowed_abstraction",
 ]
@@ -0,0 +1,111 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy import ndimage
+
+
+class AnalysisCache:
+    """Bounded memo of products derived from boards, with least recently used eviction.
+
+    Entries are keyed by the occupancy of the board, thus equal boards share entries, regardless of the array
+    instance. Thread-safe, as policies may ponder in a background thread.
+    """
+
+    def __init__(self, max_size=256):
+        """Initialize AnalysisCache.
+
+        Args:
+            max_size: Maximum number of stored entries
+        """
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        """Get the entry of `key`, call `compute` to create it if not present."""
+        value = self.lookup(key)
+        if value is None:
+            value = compute()
+            self.store(key, value)
+        return value
+
+    def lookup(self, key):
+        """Get the entry of `key`, `None` if not present."""
+        with self._lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return value
+
+    def store(self, key, value):
+        """Store `value` as entry of `key`."""
+        with self._lock:
+            self.entries[key] = value
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+
+# Cache shared by all heuristics and conditions, cleared at the start of each turn
+cache = AnalysisCache()
+
+
+def board_key(cells):
+    """Key of the occupancy of a board."""
+    return cells.shape, np.packbits(cells != 0).tobytes()
+
+
+def _read_only(array):
+    array.setflags(write=False)  # Prevent accidentally writing cached results
+    return array
+
+
+def morphology(cells, operation, iterations, **kwargs):
+    """Memoized binary morphological operation.
+
+    Args:
+        cells: Cell state
+        operation: Name of the operation in `scipy.ndimage`, e.g. `"binary_closing"`
+        iterations, kwargs: Parameters of the operation
+    Returns:
+        Read-only result of the operation
+    """
+    key = ("morphology", board_key(cells), operation, iterations, tuple(sorted(kwargs.items())))
+    return cache.get(key, lambda: _read_only(getattr(ndimage, operation)(cells, iterations=iterations, **kwargs)))
+
+
+def label_regions(cells, players=()):
+    """Memoized labelling of the regions of free cells.
+
+    Args:
+        cells: Cell state
+        players: Positions of these players are treated as free cells
+    Returns:
+        Read-only labelled cells as computed by `ndimage.label`, and the size of each label, where `sizes[0]` is the
+        number of occupied cells
+    """
+    heads = tuple(sorted({(p.y, p.x) for p in players}))
+
+    def compute():
+        empty = cells == 0
+        for y, x in heads:
+            empty[y, x] = True
+        labelled, n_labels = ndimage.label(empty)
+        return _read_only(labelled), _read_only(np.bincount(labelled.ravel(), minlength=n_labels + 1))
+
+    return cache.get(("labels", board_key(cells), heads), compute)
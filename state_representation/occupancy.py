@@ -1,42 +1,105 @@
 import numpy as np
 
-from environments import Spe_edSimulator, spe_ed
+from environments import spe_ed
+from environments.batch import PlayerBatch, simulate_batch
+from state_representation import analysis
 
 
 def occupancy_map(cells, opponents, rounds, depth=3, death_discount=1):
     """Compute occupancy probabilities in presence of opponents for each cell.
 
-    Assumes actions of opponents to be uniformly distributed.
+    Assumes actions of opponents to be uniformly distributed. All action sequences of all opponents are expanded level
+    by level as one batch, probabilities are only accumulated on the touched cells.
 
     Args:
         cells, opponents, rounds: Game state
-        depth: How many steps to project opponent actions into the future
+        depth: How many steps to project opponent actions into the future, the first step is always projected
 
     Returns:
         occ: ndarray with occupancy probabilities
     """
-    occ = (cells != 0).astype(np.float32)
-    N_actions = len(spe_ed.actions)
+    return _occupancy_levels(cells, opponents, rounds, max(depth, 1), death_discount)[-1]
 
-    def _occupancy_recursion(sim, probability=1, level=1):
-        probs = np.zeros_like(cells, dtype=float)
-        # Sum probs fro all actions
-        for a in spe_ed.actions:
-            sub_sim = sim.step([a])
-            sub_probability = probability / N_actions  # Assume uniform distribution
-            if not sub_sim.player.active:
-                sub_probability *= death_discount
 
-            probs += (sim.cells != sub_sim.cells) * sub_probability
+def occupancy_maps(cells, opponents, rounds, depth=3, death_discount=1):
+    """Memoized occupancy maps of all depths up to `depth`, computed in one traversal.
 
-            if level < depth and sub_sim.player.active:
-                _occupancy_recursion(sub_sim, sub_probability, level + 1)
+    Results are stored in the analysis cache, such that all policies evaluating the same state share them.
 
-        # Update occupancy
-        occ[:] = 1 - (1 - occ) * (1 - probs)
+    Args:
+        cells, opponents, rounds, depth, death_discount: See `occupancy_map`
+
+    Returns:
+        List of read-only ndarrays, entry `d - 1` equals the occupancy map of depth `d`
+    """
+    key = (
+        "occupancy",
+        cells.shape,
+        cells.dtype.str,
+        np.asarray(cells).tobytes(),  # Values matter, as collisions overwrite cells with -1
+        tuple((o.player_id, o.x, o.y, o.direction_index, o.speed, o.active) for o in opponents),
+        rounds,
+        depth,
+        death_discount,
+    )
+
+    def compute():
+        levels = _occupancy_levels(cells, opponents, rounds, depth, death_discount)
+        for occ in levels:
+            occ.setflags(write=False)  # Prevent accidentally writing cached results
+        return levels
+
+    return analysis.cache.get(key, compute)
+
+
+def _occupancy_levels(cells, opponents, rounds, depth, death_discount):
+    """Compute occupancy maps of all depths from 1 to `depth`."""
+    n_actions = len(spe_ed.actions)
+    flat_cells = np.asarray(cells).reshape(-1)
+    not_occupied = np.ones(flat_cells.shape)  # Probability of each cell not being occupied
+
+    # Each opponent is simulated on its own, thus branches are independent
+    opponents = [o for o in opponents if o.active]
+    states = PlayerBatch.from_players(opponents)
+    player_ids = np.array([o.player_id for o in opponents]).astype(flat_cells.dtype)
+    probability = np.ones(len(opponents))
+    trails = np.zeros((len(opponents), 0), dtype=int)  # Cells occupied by previous steps of each branch
+
+    levels = []
+    for level in range(depth):
+        if len(states) == 0:  # Nothing changes in deeper levels
+            levels.append(levels[-1] if levels else 1 - (flat_cells == 0).astype(float))
+            continue
+
+        # Expand each branch by all actions
+        parents = np.repeat(np.arange(len(states)), n_actions)
+        player_ids, trails = player_ids[parents], trails[parents]
+        states, path = simulate_batch(
+            cells, states.take(parents), np.tile(np.arange(n_actions), len(probability)), rounds + level, trails
+        )
+        sub_probability = probability[parents] / n_actions  # Assume uniform distribution
+        sub_probability[~states.active] *= death_discount
+
+        # Cells, whose value is changed by the step, collisions are marked with -1
+        touched = path >= 0
+        previous = flat_cells[np.maximum(path, 0)]
+        if trails.shape[1] > 0:
+            in_trail = np.any(path[:, :, None] == trails[:, None, :], axis=2)
+            previous = np.where(in_trail, player_ids[:, None], previous)
+        current = np.where(previous != 0, np.array(-1).astype(flat_cells.dtype), player_ids[:, None])
+        rows, steps = np.nonzero(touched & (current != previous))
+
+        # Sum probabilities of all actions per parent and cell, then combine parents
+        keys, inverse = np.unique(parents[rows] * flat_cells.size + path[rows, steps], return_inverse=True)
+        probs = np.zeros(len(keys))
+        np.add.at(probs, inverse, sub_probability[rows])
+        np.multiply.at(not_occupied, keys % flat_cells.size, 1 - probs)
+
+        # Continue expanding surviving branches
+        alive = states.active
+        states, player_ids, probability = states.take(alive), player_ids[alive], sub_probability[alive]
+        trails = np.concatenate([trails, path], axis=1)[alive]
 
-    for opponent in opponents:
-        if opponent.active:
-            _occupancy_recursion(Spe_edSimulator(cells, [opponent], rounds))
+        levels.append(1 - (flat_cells == 0) * not_occupied)
 
-    return occ
+    return [occ.reshape(cells.shape).astype(np.float32) for occ in levels]
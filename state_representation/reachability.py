@@ -0,0 +1,122 @@
+import time
+
+import numpy as np
+
+from environments.spe_ed import direction_offsets, max_speed, padded
+from state_representation import analysis
+
+
+def _shift(array, dx, dy, pad):
+    """Shift a padded array by `(dx, dy)`, cells shifted in from outside are `False`."""
+    height, width = array.shape
+    shifted = np.zeros_like(array)
+    shifted[pad + dy : height - pad + dy, pad + dx : width - pad + dx] = array[pad:-pad, pad:-pad]
+    return shifted
+
+
+def arrival_times(cells, player, rounds, horizon=8, deadline=None):
+    """Earliest number of rounds until a player can occupy each cell.
+
+    Searches the graph of player states `(x, y, direction, speed)` breadth-first, respecting speed limits, jumps in
+    rounds with `rounds % 6 == 0` and that players can not reverse. The own trail during the search is ignored.
+    Results are memoized by board in the analysis cache, thus heuristics evaluating the same board share them.
+    Results cut off by the deadline are not memoized.
+
+    Args:
+        cells: Cell state
+        player: Player to compute the map for
+        rounds: Number of the current round
+        horizon: Maximum number of rounds to look ahead
+        deadline: Stop looking ahead after this deadline, the map then only covers the rounds searched so far
+    Returns:
+        ndarray of the earliest arrival, `0` for the current position, `-1` if not reachable within the horizon
+    """
+    key = (
+        "arrival_times",
+        analysis.board_key(cells),
+        (player.x, player.y, player.direction_index, player.speed, player.active),
+        rounds % 6,
+        horizon,
+    )
+    arrival = analysis.cache.lookup(key)
+    if arrival is None:
+        arrival, complete = _arrival_times(cells, player, rounds, horizon, deadline)
+        if complete:
+            analysis.cache.store(key, arrival)
+    return arrival
+
+
+def _arrival_times(cells, player, rounds, horizon, deadline=None):
+    """Compute `arrival_times` without memoization, also returns whether the horizon was searched completely."""
+    height, width = cells.shape
+    if not player.active:
+        arrival = np.full((height, width), -1)
+        arrival.setflags(write=False)
+        return arrival, True
+
+    # Pad by the maximum speed, such that all moves can be expressed by shifts
+    pad = max_speed
+    free = padded(cells, pad) == 0
+
+    # Cells `k` steps ahead in each direction are free
+    ahead = [
+        [None] + [_shift(free, -dx * k, -dy * k, pad) for k in range(1, max_speed + 1)] for dx, dy in direction_offsets
+    ]
+    # All of the first `k` cells ahead are free
+    path_free = []
+    for d in range(4):
+        path_free.append([None, ahead[d][1]])
+        for k in range(2, max_speed + 1):
+            path_free[d].append(path_free[d][k - 1] & ahead[d][k])
+
+    # States reached in the last round, index [direction][speed - 1]
+    frontier = np.zeros((4, max_speed, *free.shape), dtype=bool)
+    frontier[player.direction_index, player.speed - 1, player.y + pad, player.x + pad] = True
+    visited = np.zeros((6, *frontier.shape), dtype=bool)  # Visited states by jump phase
+    arrival_padded = np.full(free.shape, -1)
+
+    complete = True
+    for t in range(1, horizon + 1):
+        jump = (rounds + t - 1) % 6 == 0
+        new_frontier = np.zeros_like(frontier)
+        touched = np.zeros(free.shape, dtype=bool)
+        for d in range(4):
+            dx, dy = direction_offsets[d]
+            for s in range(1, max_speed + 1):
+                # States, which lead to direction d and speed s by some action
+                start = frontier[d, s - 1] | frontier[(d + 1) % 4, s - 1] | frontier[(d - 1) % 4, s - 1]
+                if s > 1:
+                    start = start | frontier[d, s - 2]
+                if s < max_speed:
+                    start = start | frontier[d, s]
+                if not start.any():
+                    continue
+
+                # Check path and mark occupied cells
+                if jump and s > 2:  # Only first and last cell are touched, `ahead` is `False` outside of the bounds
+                    start = start & ahead[d][1] & ahead[d][s]
+                    steps = (1, s)
+                else:
+                    start = start & path_free[d][s]
+                    steps = range(1, s + 1)
+                for k in steps:
+                    touched |= _shift(start, dx * k, dy * k, pad)
+                new_frontier[d, s - 1] = _shift(start, dx * s, dy * s, pad)
+
+        # Skip states, which were visited before in the same jump phase
+        phase = (rounds + t) % 6
+        new_frontier &= ~visited[phase]
+        visited[phase] |= new_frontier
+        frontier = new_frontier
+
+        arrival_padded[touched & (arrival_padded < 0)] = t
+        if not frontier.any():
+            break
+        if deadline is not None and t < horizon and time.time() >= deadline:
+            complete = False
+            break
+
+    arrival_padded[player.y + pad, player.x + pad] = 0
+    arrival = arrival_padded[pad:-pad, pad:-pad]
+    arrival.setflags(write=False)  # Prevent accidentally writing cached results
+    return arrival, complete
@@ -0,0 +1,178 @@
+from collections import deque
+from functools import lru_cache
+
+import numpy as np
+from scipy import ndimage
+
+
+@lru_cache(maxsize=None)
+def _neighbors(height, width):
+    """Flat indices of the 4-neighborhood of each cell."""
+    neighbors = []
+    for y in range(height):
+        for x in range(width):
+            n = []
+            if x > 0:
+                n.append(y * width + x - 1)
+            if x < width - 1:
+                n.append(y * width + x + 1)
+            if y > 0:
+                n.append((y - 1) * width + x)
+            if y < height - 1:
+                n.append((y + 1) * width + x)
+            neighbors.append(tuple(n))
+    return neighbors
+
+
+class RegionTracker:
+    """Connected regions of free cells, which are updated incrementally as cells get filled.
+
+    Uses 4-connectivity like `ndimage.label`. Label ids are arbitrary, `0` marks occupied cells.
+
+    Filling a cell only triggers a search, if at least two of its neighbors were in the same region. Then breadth-first
+    searches from these neighbors are interleaved until all of them met, or all but one ran out of cells. Thus, the cost
+    of a split is bounded by the size of the smaller parts.
+    """
+
+    def __init__(self, cells, players=()):
+        """Initialize RegionTracker.
+
+        Args:
+            cells: Cell state, all cells `!= 0` are occupied
+            players: Positions of these players are treated as free cells, e.g. the heads of active players
+        """
+        self.height, self.width = cells.shape
+        empty = cells == 0
+        for p in players:
+            empty[p.y, p.x] = True
+        labels, n_labels = ndimage.label(empty)
+        self.labels = labels.ravel().tolist()
+        self.sizes = dict(enumerate(np.bincount(labels.ravel(), minlength=n_labels + 1).tolist()))
+        del self.sizes[0]
+        self.next_label = n_labels + 1
+
+    def copy(self):
+        """Create an independent copy."""
+        tracker = RegionTracker.__new__(RegionTracker)
+        tracker.height, tracker.width = self.height, self.width
+        tracker.labels = self.labels.copy()
+        tracker.sizes = self.sizes.copy()
+        tracker.next_label = self.next_label
+        return tracker
+
+    def region(self, x, y):
+        """Label of the region of cell `(x, y)`, `0` if the cell is occupied."""
+        return self.labels[y * self.width + x]
+
+    def size(self, x, y):
+        """Size of the region of cell `(x, y)`, `0` if the cell is occupied."""
+        label = self.labels[y * self.width + x]
+        return self.sizes[label] if label != 0 else 0
+
+    @property
+    def n_regions(self):
+        """Number of regions."""
+        return len(self.sizes)
+
+    def labelled(self):
+        """Labels of all cells as ndarray."""
+        return np.array(self.labels).reshape(self.height, self.width)
+
+    def fill(self, positions):
+        """Mark cells as occupied and update the regions.
+
+        Args:
+            positions: Iterable of `(x, y)`, occupied cells are skipped
+        Returns:
+            Undo record, can be passed to `restore` to revert this and all later fills
+        """
+        record = ([], {}, self.next_label)
+        for x, y in positions:
+            self._fill(int(y) * self.width + int(x), record)
+        return record
+
+    def restore(self, record):
+        """Revert `fill` given its undo record."""
+        writes, sizes, self.next_label = record
+        for i, label in reversed(writes):
+            self.labels[i] = label
+        for label, size in sizes.items():
+            if size == 0:
+                self.sizes.pop(label, None)
+            else:
+                self.sizes[label] = size
+
+    def _set_size(self, label, size, record):
+        """Change the size of a region and remember its previous size."""
+        record[1].setdefault(label, self.sizes.get(label, 0))
+        if size == 0:
+            del self.sizes[label]
+        else:
+            self.sizes[label] = size
+
+    def _fill(self, i, record):
+        """Fill cell `i` and split its region if necessary."""
+        labels = self.labels
+        label = labels[i]
+        if label == 0:  # Already occupied
+            return
+
+        writes = record[0]
+        writes.append((i, label))
+        labels[i] = 0
+        self._set_size(label, self.sizes[label] - 1, record)
+
+        neighbors = _neighbors(self.height, self.width)
+        starts = [n for n in neighbors[i] if labels[n] == label]
+        if len(starts) < 2:  # Region can not be split
+            return
+
+        # Interleaved breadth-first searches, joined by union-find
+        owner = {s: k for k, s in enumerate(starts)}
+        members = [[s] for s in starts]
+        frontiers = [deque([s]) for s in starts]
+        group = list(range(len(starts)))
+
+        def find(k):
+            while group[k] != k:
+                k = group[k]
+            return k
+
+        dead = [False] * len(starts)  # Searches, whose region was split off
+        n_groups = len(starts)
+        while n_groups > 1:
+            for k, frontier in enumerate(frontiers):
+                if not frontier:
+                    continue
+                for n in neighbors[frontier.popleft()]:
+                    if labels[n] != label:
+                        continue
+                    o = owner.get(n)
+                    if o is None:
+                        owner[n] = k
+                        members[k].append(n)
+                        frontier.append(n)
+                    elif find(o) != find(k):  # Searches met, both are in the same region
+                        group[find(o)] = find(k)
+                        n_groups -= 1
+
+            # Groups without frontier are complete, they are split off as new regions
+            for root in {find(k) for k in range(len(starts)) if not dead[k]}:
+                if n_groups <= 1:
+                    break
+                searches = [k for k in range(len(starts)) if not dead[k] and find(k) == root]
+                if any(frontiers[k] for k in searches):
+                    continue
+
+                new_label = self.next_label
+                self.next_label += 1
+                size = 0
+                for k in searches:
+                    for n in members[k]:
+                        writes.append((n, label))
+                        labels[n] = new_label
+                    size += len(members[k])
+                    dead[k] = True
+                self._set_size(new_label, size, record)
+                self._set_size(label, self.sizes[label] - size, record)
+                n_groups -= 1
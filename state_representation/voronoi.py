@@ -0,0 +1,61 @@
+import time
+
+import numpy as np
+
+from environments.spe_ed import padded
+
+
+def geodesic_voronoi(cells, players, max_steps, deadline=None):
+    """Compute territories of all players by expanding them simultaneously from their positions.
+
+    Each step, all territories grow by their 4-neighborhood into free cells. Cells, which are reached by more than one
+    player at the same time or which are reached by another player later on, are removed from all territories and
+    block further expansions. Only the cells added in the previous step are expanded, as all other neighbors are
+    already claimed or blocked.
+
+    Args:
+        cells: Cell state, positions of players are treated as free
+        players: Players, the territories are ordered accordingly
+        max_steps: Maximum number of expansions
+        deadline: Stop expanding after this deadline
+    Returns:
+        territories: `(len(players), height, width)` boolean ndarray
+        distances: Number of steps it took to reach each cell of a territory, `-1` outside of territories
+    """
+    height, width = cells.shape
+
+    # Padded arrays to avoid special treatment of the border
+    mask = padded(cells, 1) == 0
+    territories = np.zeros((len(players), height + 2, width + 2), dtype=bool)
+    for idx, p in enumerate(players):
+        mask[p.y + 1, p.x + 1] = True  # Reset player position to allow expansion
+        territories[idx, p.y + 1, p.x + 1] = True
+    distances = np.where(np.any(territories, axis=0), 0, -1)
+
+    frontiers = territories.copy()
+    reached = np.zeros_like(territories)
+    for step in range(1, max_steps + 1):
+        if not np.any(frontiers):  # Nothing left to expand
+            break
+
+        # Expand frontiers by one step
+        reached[:] = False
+        reached[:, 1:-1, 1:-1] = (
+            frontiers[:, :-2, 1:-1] | frontiers[:, 2:, 1:-1] | frontiers[:, 1:-1, :-2] | frontiers[:, 1:-1, 2:]
+        )
+        reached &= mask
+        frontiers = reached & ~territories
+        territories |= reached
+
+        # Remove cells reached by multiple players
+        overlaps = np.sum(territories, axis=0) > 1
+        mask &= ~overlaps
+        territories &= ~overlaps
+        frontiers &= ~overlaps
+        distances[np.any(frontiers, axis=0)] = step
+
+        if deadline is not None and time.time() >= deadline:
+            break
+
+    distances[~np.any(territories, axis=0)] = -1
+    return territories[:, 1:-1, 1:-1], distances[1:-1, 1:-1]
@@ -1,5 +1,7 @@
 import numpy as np
 
+from environments.spe_ed import Cells
+
 
 def padded_window(cells, x, y, radius, padding_value=0):
     """Slice a fixed size window from `cells`, centered on `(y, x)`. Borders are padded.
@@ -17,6 +19,12 @@ def padded_window(cells, x, y, radius, padding_value=0):
     if radius <= x < width - radius and radius <= y < height - radius:
         # No padding neccessary, return direct slice
         window = cells[y - radius : y + radius + 1, x - radius : x + radius + 1]
+    elif isinstance(cells, Cells) and cells.buffer is not None and radius <= cells.padding and padding_value == 1:
+        # Padding matches the border of the buffer, return slice of the buffer
+        p = cells.padding
+        window = cells.buffer[y + p - radius : y + p + radius + 1, x + p - radius : x + p + radius + 1]
+        if not cells.flags.writeable:  # Keep read-only observations read-only
+            window.setflags(write=False)
     else:  # Padding required
         # Initialize window with padding and copy the visible cells
         window = np.empty((radius * 2 + 1, radius * 2 + 1), dtype=cells.dtype)
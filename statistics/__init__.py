@@ -1,4 +1,4 @@
-from statistics.log_files import get_log_files
+from statistics.log_files import get_log_files, map_log_files
 from statistics.plots import create_plots, create_tournament_plots
 from statistics.stats import fetch_statistics
 
@@ -6,5 +6,6 @@ __all__ = [
     "create_plots",
     "fetch_statistics",
     "get_log_files",
+    "map_log_files",
     "create_tournament_plots",
 ]
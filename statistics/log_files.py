@@ -1,5 +1,12 @@
+import multiprocessing as mp
+import os
+from collections import deque
 from pathlib import Path
 
+from tqdm import tqdm
+
+from environments import game_log
+
 
 def get_log_files(log_dir, prefix=""):
     """Get a list of all logfiles in `log_dir`.
@@ -8,4 +15,42 @@ def get_log_files(log_dir, prefix=""):
         prefix: Can be used to filter by date, e.g. use `"20201106-10"` to only get logfiles from the 6th November
                 from 10:00 til 10:59.
     """
-    return [f for f in Path(log_dir).iterdir() if f.name.endswith(".json") and f.name.startswith(prefix)]
+    return [f for f in Path(log_dir).iterdir() if f.suffix in (".json", game_log.suffix) and f.name.startswith(prefix)]
+
+
+def _map_chunk(function, log_files):
+    """Apply `function` to a chunk of log files in a worker process."""
+    return [function(log_file) for log_file in log_files]
+
+
+def map_log_files(function, log_files, cores=None, chunksize=16, desc=None):
+    """Apply `function` to each log file on a pool of processes.
+
+    Results are yielded in the order of `log_files`. Workers receive the files in chunks of `chunksize`. At most two
+    chunks per process are submitted ahead of the consumer, such that memory stays bounded, even if the consumer is
+    slower than the workers.
+
+    Args:
+        function: Function of a log file, must be picklable
+        log_files: Paths of the log files
+        cores: Number of processes, default uses all, `1` processes all files in the calling process
+        chunksize: Number of log files sent to a worker at once
+        desc: Description of the progress bar
+    """
+    log_files = list(log_files)
+    with tqdm(total=len(log_files), desc=desc, disable=len(log_files) == 0) as pbar:
+        if cores == 1 or len(log_files) <= 1:
+            for result in map(function, log_files):
+                yield result
+                pbar.update()
+            return
+
+        n_processes = os.cpu_count() if cores is None else cores
+        with mp.Pool(n_processes) as pool:
+            pending = deque()
+            for start in range(0, len(log_files), chunksize):
+                pending.append(pool.apply_async(_map_chunk, (function, log_files[start : start + chunksize])))
+                while len(pending) > 2 * n_processes or (pending and start + chunksize >= len(log_files)):
+                    for result in pending.popleft().get():
+                        yield result
+                        pbar.update()
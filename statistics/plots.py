@@ -1,5 +1,6 @@
 from pathlib import Path
-from statistics.stats import fetch_statistics, get_win_rate, normalize_winrate
+from statistics.stats import fetch_statistics, normalize_winrate, size_labels, win_rate_cube, win_rates
+from statistics.store import open_statistics
 
 import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
@@ -114,9 +115,9 @@ def plot_competition(output_file, stats_dir, stats):
     plt.close()
 
 
-def create_plots(log_dir, stats_file):
+def create_plots(log_dir, stats_file, cores=None):
     # Load statistics
-    stats = fetch_statistics(log_dir, stats_file)
+    stats = fetch_statistics(log_dir, stats_file, cores=cores)
 
     # Create output folder
     plot_dir = Path(stats_file).parent / "plots"
@@ -134,20 +135,16 @@ def create_plots(log_dir, stats_file):
 
 
 def plot_tournament_win_rates(
-    policy_names, policy_nick_names, stats, output_file, number_of_players=None, grid_size=None
+    policy_names, policy_nick_names, cube, output_file, number_of_players=None, grid_size=None
 ):
-    win_rates = np.array(
-        [
-            get_win_rate(policy_name, stats, number_of_players=number_of_players, grid_size=grid_size)
-            for policy_name in policy_names
-        ]
-    )
+    rates = win_rates(cube, number_of_players=number_of_players, grid_size=grid_size).reindex(policy_names)
+    rates = rates[["mean", "count", "std"]].to_numpy(dtype=float)
     # Order by win rate descendingly
-    order = np.argsort(win_rates[:, 0])[::-1]
+    order = np.argsort(rates[:, 0])[::-1]
     policy_nick_names = np.array(policy_nick_names)[order]
-    win_rates = win_rates[order]
+    rates = rates[order]
 
-    mean, count, std = win_rates[:, 0], win_rates[:, 1], win_rates[:, 2]
+    mean, count, std = rates[:, 0], rates[:, 1], rates[:, 2]
 
     # Compute confidence interval
     conf = 1.96 * std / np.sqrt(count)
@@ -162,24 +159,22 @@ def plot_tournament_win_rates(
     plt.close()
 
 
-def plot_matchups(policy_names, policy_nick_names, stats, output_file):
+def plot_matchups(policy_names, policy_nick_names, cube, baseline_winrate, output_file):
     """Create a matchup table.
 
     Args:
             policy_names: full name of policy
             policy_nick_names: policy nick names
-            stats: pandas df of statistics from fetch_statistics
+            cube: Win rate cube from win_rate_cube
+            baseline_winrate: Expected win rate of a random policy
             output_file: File to save figure to
     """
-    matchup_win_rates = []
-    for policy_name in policy_names:
-        policy_matchups = [
-            get_win_rate(policy_name, stats, matchup_opponent=opponent_policy) for opponent_policy in policy_names
-        ]
-        matchup_win_rates.append([x[0] if x is not None else np.nan for x in policy_matchups])
-    matchup_win_rates = np.array(matchup_win_rates)
-
-    baseline_winrate = np.mean(1 / stats["names"].map(len))
+    matchup_win_rates = (
+        win_rates(cube, matchups=True)["mean"]
+        .unstack()
+        .reindex(index=policy_names, columns=policy_names)
+        .to_numpy(dtype=float)
+    )
 
     ax = sns.heatmap(
         normalize_winrate(matchup_win_rates, baseline_winrate),
@@ -202,17 +197,19 @@ def plot_matchups(policy_names, policy_nick_names, stats, output_file):
     plt.close()
 
 
-def plot_policy_times(stats_dir, output_file):
-    sns.boxplot(x="policy", y="time", data=pd.read_csv(stats_dir / r"times.csv"))
+def plot_policy_times(stats_file, output_file):
+    with open_statistics(stats_file, key_column="uuid") as store:
+        times = store.times()
+    sns.boxplot(x="policy", y="time", data=times)
     plt.tight_layout(pad=0)
 
     plt.savefig(output_file)
     plt.close()
 
 
-def create_tournament_plots(log_dir, stats_dir):
+def create_tournament_plots(log_dir, stats_dir, cores=None):
     # Load statistics
-    stats = fetch_statistics(log_dir, stats_dir / "statistics.csv", key_column="uuid")
+    stats = fetch_statistics(log_dir, stats_dir / "statistics.sqlite", key_column="uuid", cores=cores)
 
     # Create output folder
     plot_dir = stats_dir / "plots"
@@ -221,22 +218,19 @@ def create_tournament_plots(log_dir, stats_dir):
     # Create plots of matchup stats, overall win rate of each policy
     policy_names = np.unique(np.concatenate(stats["names"].values).flat)
     policy_nick_names = [name if len(name) <= 10 else name[:8] + "..." for name in policy_names]
+    cube = win_rate_cube(stats)
+    baseline_winrate = np.mean(1 / stats["names"].map(len))
 
-    plot_matchups(policy_names, policy_nick_names, stats, plot_dir / "matchups.png")
+    plot_matchups(policy_names, policy_nick_names, cube, baseline_winrate, plot_dir / "matchups.png")
 
-    plot_tournament_win_rates(policy_names, policy_nick_names, stats, plot_dir / "win_rate.png")
-    plot_tournament_win_rates(
-        policy_names, policy_nick_names, stats, plot_dir / "win_rate_small.png", grid_size="small"
-    )
-    plot_tournament_win_rates(
-        policy_names, policy_nick_names, stats, plot_dir / "win_rate_medium.png", grid_size="medium"
-    )
-    plot_tournament_win_rates(
-        policy_names, policy_nick_names, stats, plot_dir / "win_rate_large.png", grid_size="large"
-    )
+    plot_tournament_win_rates(policy_names, policy_nick_names, cube, plot_dir / "win_rate.png")
+    for grid_size in size_labels:
+        plot_tournament_win_rates(
+            policy_names, policy_nick_names, cube, plot_dir / f"win_rate_{grid_size}.png", grid_size=grid_size
+        )
     for p in range(2, min(7, len(policy_names) + 1)):
         plot_tournament_win_rates(
-            policy_names, policy_nick_names, stats, plot_dir / f"win_rate_{p}p.png", number_of_players=p
+            policy_names, policy_nick_names, cube, plot_dir / f"win_rate_{p}p.png", number_of_players=p
         )
 
-    plot_policy_times(stats_dir, plot_dir / "policy_times.png")
+    plot_policy_times(stats_dir / "statistics.sqlite", plot_dir / "policy_times.png")
@@ -1,82 +1,155 @@
 import logging
-from pathlib import Path
-from statistics.log_files import get_log_files
+from statistics.log_files import get_log_files, map_log_files
+from statistics.store import open_statistics
 
+import numpy as np
 import pandas as pd
-from tqdm import tqdm
 
 from environments.spe_ed import SavedGame
 
 
-def fetch_statistics(log_dir, csv_file, key_column="date"):
-    # Seach for unprocessed log files
-    known_log_files = set(pd.read_csv(csv_file)[key_column]) if Path(csv_file).exists() else set()
-    new_log_files = [
-        f for f in get_log_files(log_dir) if f.name[:-5] not in known_log_files and f.name[:-5] != "_name_mapping"
-    ]  # exclude name mapping
+def _game_statistics(log_file):
+    """Summarize a log file for the statistics store, `None` if it can not be loaded."""
+    try:
+        game = SavedGame.load_metadata(log_file)
+    except Exception:
+        logging.exception(f"Failed to load {log_file}")
+        return None
+
+    return (
+        log_file.stem,  # name of game
+        game.rounds,
+        game.winner.name if game.winner is not None else None,
+        game.names[game.you - 1] if game.you is not None else None,
+        game.names,
+        game.width,
+        game.height,
+    )
+
+
+def fetch_statistics(log_dir, stats_file, key_column="date", batch_size=1000, cores=None):
+    """Load the statistics of all games, log files are only parsed once and then stored in `stats_file`.
+
+    Args:
+        log_dir: Directory of the log files
+        stats_file: Path of the statistics database
+        key_column: Name of the column of the log file names, `"date"` is parsed as datetime
+        batch_size: Number of parsed log files, which are written to the database at once
+        cores: Number of processes parsing log files, default uses all
+    """
+    with open_statistics(stats_file, key_column) as store:
+        # Seach for unprocessed log files
+        known_log_files = store.keys()
+        new_log_files = [
+            f for f in get_log_files(log_dir) if f.stem not in known_log_files and f.stem != "_name_mapping"
+        ]  # exclude name mapping
 
-    if len(new_log_files) > 0:
         # Process new log files
         results = []
-        for log_file in tqdm(new_log_files, desc="Parsing new log files"):
-            try:
-                game = SavedGame.load(log_file)
-            except Exception:
-                logging.exception(f"Failed to load {log_file}")
+        for result in map_log_files(_game_statistics, new_log_files, cores, chunksize=64, desc="Parsing new log files"):
+            if result is None:
                 continue
+            results.append(result)
+            if len(results) >= batch_size:  # Append new statistics
+                store.add_games(results)
+                results = []
+        store.add_games(results)
+
+        stats = store.games(key_column)
+
+    if key_column == "date":
+        stats["date"] = pd.to_datetime(stats["date"], format="%Y%m%d-%H%M%S")
+    return stats
 
-            results.append(
-                (
-                    log_file.name[:-5],  # name of game
-                    game.rounds,
-                    game.winner.name if game.winner is not None else None,
-                    game.names[game.you - 1] if game.you is not None else None,  # rounds  # winner  # you
-                    game.names,  # names
-                    game.width,
-                    game.height,
-                )
-            )
-
-        # Append new statisics
-        df = pd.DataFrame(results, columns=[key_column, "rounds", "winner", "you", "names", "width", "height"])
-        df.to_csv(csv_file, mode="a", header=len(known_log_files) == 0, index=False)
-
-    # Return all data from csv
-    return pd.read_csv(
-        csv_file,
-        parse_dates=["date"] if key_column == "date" else None,
-        converters={"names": lambda x: x.strip("[]").replace("'", "").split(", ")},
+
+size_bins = [1681, 3132, 4030, 6400]  # 1/3 and 2/3 quantile of size distribution
+size_labels = ["small", "medium", "large"]
+all_opponents = "*"  # Opponent of the rows of the cube, which count games against any opponent
+
+
+def win_rate_cube(stats):
+    """Aggregate wins of all policies in one pass.
+
+    Games are exploded into one row per participating policy, and into one row per pair of policy and opponent. Both
+    are counted by policy, opponent, number of players and size of the grid. Slices of the cube can be summed up, except
+    along the opponent, as a game counts for each of its opponents.
+
+    Args:
+        stats: pandas df of statistics from fetch_statistics
+    Returns:
+        DataFrame indexed by `(policy, opponent, n_players, size)` with columns `wins` and `games`, where `opponent`
+        is `all_opponents` for all games of the policy and `size` is one of `size_labels` or NaN outside of the bins
+    """
+    games = pd.DataFrame(
+        {
+            "game": range(len(stats)),
+            "winner": stats["winner"].to_numpy(),
+            "n_players": stats["names"].map(len).to_numpy(),
+            "size": pd.cut(stats["width"] * stats["height"], bins=size_bins, labels=size_labels).astype(object),
+            "policy": stats["names"].to_numpy(),
+        }
     )
+    participants = games.explode("policy").drop_duplicates(["game", "policy"])
+    participants["won"] = participants["winner"] == participants["policy"]
 
+    pairs = participants.merge(
+        participants[["game", "policy"]].rename(columns={"policy": "opponent"}),
+        on="game",
+    )
+    pairs = pairs[pairs["policy"] != pairs["opponent"]]
 
-def get_win_rate(policy, stats, number_of_players=None, matchup_opponent=None, grid_size=None):
+    return (
+        pd.concat([participants.assign(opponent=all_opponents), pairs])
+        .groupby(["policy", "opponent", "n_players", "size"], dropna=False)["won"]
+        .agg(wins="sum", games="count")
+    )
+
+
+def win_rates(cube, number_of_players=None, grid_size=None, matchups=False):
+    """Win rates of all policies in a slice of the cube.
+
+    Args:
+            cube: Win rate cube from win_rate_cube
+            number_of_players: Only count games with this number of players
+            grid_size: "small", "medium" or "large"
+            matchups: Win rates of each pair of policy and opponent instead of each policy
+    Returns:
+        DataFrame indexed by policy or `(policy, opponent)` with columns `mean`, `count` and `std` of winning
+    """
+    df = cube.reset_index()
+    df = df[df["opponent"] != all_opponents] if matchups else df[df["opponent"] == all_opponents]
+    if number_of_players is not None:
+        df = df[df["n_players"] == number_of_players]
+    if grid_size is not None:
+        df = df[df["size"] == grid_size]
+
+    counts = df.groupby(["policy", "opponent"] if matchups else "policy")[["wins", "games"]].sum()
+    wins, games = counts["wins"], counts["games"]
+    # Sample standard deviation of the won indicator
+    std = np.sqrt((wins - wins**2 / games) / (games - 1))
+    return pd.DataFrame({"mean": wins / games, "count": games, "std": std.where(games > 1)})
+
+
+def get_win_rate(policy, cube, number_of_players=None, matchup_opponent=None, grid_size=None):
     """Returns overall win rate for the selected policy by default or specific for a given opponent or size of the grid.
 
     Args:
             policy: full name of policy
-            stats: pandas df of statistics from fetch_statistics
+            cube: Win rate cube from win_rate_cube
+            number_of_players: Only count games with this number of players
             matchup_opponent: full name of policy to compare against
             grid_size: "small", "medium" or "large"
-
+    Returns:
+        Mean, count and standard deviation of winning, `None` if the opponent is the policy itself
     """
-    relevant_games = stats[stats["names"].apply(lambda x: policy in x)]
-    if number_of_players is not None:
-        relevant_games = relevant_games[relevant_games["names"].map(len) == number_of_players]
-    if matchup_opponent is not None:
-        if matchup_opponent == policy:
-            return None
-        relevant_games = relevant_games[relevant_games["names"].str.contains(matchup_opponent, regex=False)]
-    if grid_size is not None:
-        relevant_games = relevant_games[
-            pd.cut(
-                relevant_games["width"] * relevant_games["height"],
-                bins=[1681, 3132, 4030, 6400],  # 1/3 and 2/3 quantile of size distribution
-                labels=["small", "medium", "large"],
-            )
-            == grid_size
-        ]
-
-    won = (relevant_games["winner"] == policy).agg(["mean", "count", "std"])
+    if matchup_opponent == policy:
+        return None
+
+    rates = win_rates(cube, number_of_players, grid_size, matchups=matchup_opponent is not None)
+    key = policy if matchup_opponent is None else (policy, matchup_opponent)
+    if key not in rates.index:
+        return np.nan, 0, np.nan
+    won = rates.loc[key]
     return won["mean"], won["count"], won["std"]
 
 
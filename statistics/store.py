@@ -0,0 +1,143 @@
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+_schema = """
+CREATE TABLE IF NOT EXISTS games (
+    key TEXT PRIMARY KEY,
+    rounds INTEGER,
+    winner TEXT,
+    you TEXT,
+    width INTEGER,
+    height INTEGER
+);
+CREATE TABLE IF NOT EXISTS players (
+    key TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT,
+    PRIMARY KEY (key, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS times (
+    policy TEXT,
+    time REAL
+);
+"""
+
+
+class StatisticsStore:
+    """Statistics of games in an SQLite database.
+
+    Games are indexed by their key, e.g. the name of the log file, and the names of the players are stored as a
+    separate table, such that they are loaded as lists without parsing strings.
+    """
+
+    def __init__(self, db_file):
+        """Initialize StatisticsStore, creates the database if it does not exist.
+
+        Args:
+            db_file: Path of the database
+        """
+        self.db_file = Path(db_file)
+        self.connection = sqlite3.connect(self.db_file)
+        with self.connection:
+            self.connection.executescript(_schema)
+
+    def __contains__(self, key):
+        return self.connection.execute("SELECT 1 FROM games WHERE key = ?", (key,)).fetchone() is not None
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def keys(self):
+        """Keys of all stored games."""
+        return {key for key, in self.connection.execute("SELECT key FROM games")}
+
+    def add_games(self, games):
+        """Add games in a single transaction, games with known keys are skipped.
+
+        Args:
+            games: Tuples of `(key, rounds, winner, you, names, width, height)`
+        """
+        games = list(games)
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO games VALUES (?, ?, ?, ?, ?, ?)",
+                [(key, rounds, winner, you, width, height) for key, rounds, winner, you, _, width, height in games],
+            )
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO players VALUES (?, ?, ?)",
+                [(game[0], position, name) for game in games for position, name in enumerate(game[4])],
+            )
+
+    def add_times(self, times):
+        """Add execution times in a single transaction.
+
+        Args:
+            times: Tuples of `(policy, time)`
+        """
+        with self.connection:
+            self.connection.executemany("INSERT INTO times VALUES (?, ?)", times)
+
+    def games(self, key_column="key"):
+        """Load all games.
+
+        Args:
+            key_column: Name of the column of the keys
+        Returns:
+            DataFrame with the columns `key_column`, `rounds`, `winner`, `you`, `names`, `width` and `height`
+        """
+        games = pd.read_sql_query("SELECT * FROM games ORDER BY key", self.connection)
+        players = pd.read_sql_query("SELECT key, name FROM players ORDER BY key, position", self.connection)
+        names = players.groupby("key", sort=False)["name"].agg(list)
+        games.insert(4, "names", names.reindex(games["key"]).to_list())
+        return games.rename(columns={"key": key_column})
+
+    def times(self):
+        """Load all execution times as DataFrame with the columns `policy` and `time`."""
+        return pd.read_sql_query("SELECT policy, time FROM times", self.connection)
+
+    def import_csv(self, csv_file, key_column="date"):
+        """Import games from a statistics CSV file, as written by previous versions."""
+        df = pd.read_csv(
+            csv_file,
+            dtype={key_column: str},
+            converters={"names": lambda x: x.strip("[]").replace("'", "").split(", ")},
+        )
+        df = df[[key_column, "rounds", "winner", "you", "names", "width", "height"]].astype(object)
+        self.add_games(df.where(df.notna(), None).itertuples(index=False, name=None))
+
+    def import_times_csv(self, csv_file):
+        """Import execution times from a CSV file, as written by previous versions."""
+        self.add_times(pd.read_csv(csv_file)[["policy", "time"]].itertuples(index=False, name=None))
+
+    def close(self):
+        """Close the database."""
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_statistics(db_file, key_column="date"):
+    """Open a statistics store, statistics of previous versions are imported once.
+
+    Previous versions wrote the games into a CSV file with the same name as the database and the execution times into
+    `times.csv` in the same directory.
+
+    Args:
+        db_file: Path of the database
+        key_column: Name of the key column in the legacy CSV file
+    """
+    db_file = Path(db_file)
+    store = StatisticsStore(db_file)
+    csv_file = db_file.with_suffix(".csv")
+    if len(store) == 0 and csv_file.exists():
+        store.import_csv(csv_file, key_column)
+    times_file = db_file.parent / "times.csv"
+    if times_file.exists() and store.connection.execute("SELECT 1 FROM times LIMIT 1").fetchone() is None:
+        store.import_times_csv(times_file)
+    return store
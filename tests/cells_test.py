@@ -1,7 +1,15 @@
+import json
+import pickle
+import tempfile
 import unittest
+from pathlib import Path
 
-from environments.spe_ed import Cells, SavedGame
-from tests.heuristic_test import default_round1_board
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from environments.spe_ed import Cells, Player, SavedGame, action_codes, actions, directions_by_name, padded
+from heuristics import WallhugHeuristic
+from tests.heuristic_test import default_almost_full_board, default_round1_board
 
 
 class TestCells(unittest.TestCase):
@@ -36,3 +44,144 @@ class TestCells(unittest.TestCase):
         self.assertEqual(cells.is_free([4, 5]), False)
         self.assertEqual(cells.is_free([5, 4]), False)
         self.assertEqual(cells.is_free([5, -5]), False)
+
+    def test_are_free(self):
+        """Bulk query matches single queries."""
+        cells = Cells(default_round1_board()[0])
+        positions = [[x, y] for x in range(-2, 7) for y in range(-2, 7)]
+
+        free = cells.are_free(positions)
+        assert_array_equal(free, [cells.is_free(p) for p in positions])
+        assert_array_equal(cells.are_free([[0, 0], [1, -1]], origin=(1, 1)), [True, True])
+
+        heuristic = WallhugHeuristic()
+        self.assertEqual(heuristic.score(*default_round1_board()), 0)
+        self.assertEqual(heuristic.score(*default_almost_full_board()), 2 / 3)
+
+    def test_padded(self):
+        """Padded cells behave like cells, but are surrounded by occupied cells."""
+        board = default_round1_board()[0]
+        cells = Cells.padded(board, padding=2)
+
+        assert_array_equal(cells, board)
+        self.assertEqual(cells.buffer.shape, (9, 9))
+        assert_array_equal(padded(cells, 1), np.pad(board, 1, constant_values=1))
+        self.assertIs(padded(cells, 1).base, cells.buffer)
+        assert_array_equal(padded(np.asarray(board), 1), np.pad(board, 1, constant_values=1))
+
+        positions = [[x, y] for x in range(-4, 9) for y in range(-4, 9)]
+        assert_array_equal(cells.are_free(positions), Cells(board).are_free(positions))
+
+        self.assertIs(Cells(cells).buffer, cells.buffer)  # Views keep the padding
+        self.assertIs(cells.view().buffer, cells.buffer)
+        self.assertIsNone(cells[1:].buffer)
+        self.assertIsNone((cells != 0).buffer)
+
+        copy = cells.copy()  # Copies omit the border
+        copy[2, 3] = False
+        self.assertIsNone(copy.buffer)
+        self.assertTrue(cells[2, 3])
+        assert_array_equal(copy.are_free([[3, 2], [-1, 0]]), [True, False])
+
+
+class TestPlayer(unittest.TestCase):
+    def test_direction(self):
+        player = Player(1, 2, 3, directions_by_name["up"], 1, True)
+        self.assertEqual(player.direction_index, 3)
+        self.assertIs(player.direction, directions_by_name["up"])
+
+        player.direction = directions_by_name["left"]
+        self.assertEqual(player.direction_index, 2)
+        player.perform("turn_left")
+        self.assertIs(player.direction, directions_by_name["down"])
+
+    def test_perform_code(self):
+        """Actions by code are equivalent to actions by name."""
+        for action in actions:
+            for speed in (1, 5, 10):
+                by_name = Player(1, 2, 3, directions_by_name["up"], speed, True)
+                by_code = by_name.copy()
+                by_name.perform(action)
+                by_code.perform(action_codes[action])
+                self.assertEqual(by_name, by_code)
+
+    def test_perform_invalid(self):
+        player = Player(1, 2, 3, directions_by_name["up"], 1, True)
+        player.perform("jump")
+        self.assertFalse(player.active)
+
+        for code in [-1, len(actions)]:
+            player = Player(1, 2, 3, directions_by_name["up"], 1, True)
+            player.perform(code)
+            self.assertFalse(player.active)
+
+        player = Player(1, 2, 3, directions_by_name["up"], 10, True)
+        player.perform("speed_up")
+        self.assertFalse(player.active)
+
+    def test_copy(self):
+        player = Player(1, 2, 3, directions_by_name["up"], 1, True, name="spe_ed")
+        copy = player.copy()
+        copy.perform("speed_up")
+
+        self.assertEqual(copy.name, "spe_ed")
+        self.assertEqual(player.speed, 1)
+        self.assertEqual(copy.speed, 2)
+
+    def test_json(self):
+        player = Player(2, 4, 5, directions_by_name["down"], 3, False, name="spe_ed")
+        player_id, data = player.to_dict()
+
+        self.assertEqual(data, {"x": 4, "y": 5, "direction": "down", "speed": 3, "active": False, "name": "spe_ed"})
+        self.assertEqual(Player.from_json(player_id, data), player)
+
+    def test_pickle(self):
+        player = Player(1, 2, 3, directions_by_name["up"], 4, True)
+        self.assertEqual(pickle.loads(pickle.dumps(player)), player)
+
+
+class TestSavedGame(unittest.TestCase):
+    def test_lazy(self):
+        """States are decoded on access."""
+        game = SavedGame.load(r"tests/logs/20201019-182018.json")
+        self.assertIsNone(game.cell_states.states[5])
+
+        assert_array_equal(game.cell_states[5], game.data[5]["cells"])
+        self.assertIs(game.cell_states[5], game.cell_states[5])
+        self.assertEqual(len(game.cell_states), len(game.data))
+        self.assertEqual(game.player_states[-1], game.player_states[len(game.data) - 1])
+
+    def test_metadata(self):
+        """Metadata equals the summary of the completely loaded game."""
+        for log_file in ["20201019-182018.json", "20201030-180428.json", "20201101-141529.json"]:
+            with self.subTest(log_file=log_file):
+                game = SavedGame.load(f"tests/logs/{log_file}")
+                metadata = SavedGame.load_metadata(f"tests/logs/{log_file}")
+
+                self.assertEqual(metadata.rounds, game.rounds)
+                self.assertEqual((metadata.width, metadata.height), (game.width, game.height))
+                self.assertEqual(metadata.you, game.you)
+                self.assertEqual(metadata.names, game.names)
+                self.assertEqual(metadata.winner, game.winner)
+
+    def test_metadata_format(self):
+        """Metadata does not depend on the formatting of the JSON text or on the content of player names."""
+        with open("tests/logs/20201019-182018.json") as f:
+            data = json.load(f)
+        names = ['{"running": true}, {', '\\"]}', "[\u00e4"]
+        for state in data:
+            for player_data, name in zip(state["players"].values(), names):
+                player_data["name"] = name
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for kwargs in [{}, {"indent": 2}, {"separators": (",", ":")}, {"ensure_ascii": False}]:
+                with self.subTest(**kwargs):
+                    log_file = Path(tmp_dir) / "game.json"
+                    with open(log_file, "w") as f:
+                        json.dump(data, f, **kwargs)
+                    game = SavedGame.load(log_file)
+                    metadata = SavedGame.load_metadata(log_file)
+
+                    self.assertEqual(metadata.rounds, game.rounds)
+                    self.assertEqual(metadata.names, game.names)
+                    self.assertEqual(metadata.winner, game.winner)
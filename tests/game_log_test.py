@@ -0,0 +1,142 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from environments.game_log import CompactLog, GameRecorder, compact_to_json, json_to_compact
+from environments.spe_ed import SavedGame
+from policies import RandomPolicy
+from tournament.tournament import TournamentLogger, play_game
+
+log_files = [
+    Path("tests/logs") / name for name in ["20201019-182018.json", "20201030-180428.json", "20201101-141529.json"]
+]
+
+
+class TestCompactLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def test_round_trip(self):
+        """Converting to the compact format and back restores the JSON log."""
+        for log_file in log_files:
+            with self.subTest(log_file=log_file.name):
+                compact_file = Path(self.tmp_dir.name) / "game.spedlog"
+                json_file = Path(self.tmp_dir.name) / "game.json"
+                json_to_compact(log_file, compact_file)
+                compact_to_json(compact_file, json_file)
+
+                with open(log_file) as f, open(json_file) as g:
+                    self.assertEqual(json.load(f), json.load(g))
+
+    def test_saved_game(self):
+        """Compact logs are loaded like JSON logs."""
+        for log_file in log_files:
+            with self.subTest(log_file=log_file.name):
+                compact_file = Path(self.tmp_dir.name) / "game.spedlog"
+                json_to_compact(log_file, compact_file)
+
+                expected = SavedGame.load(log_file)
+                game = SavedGame.load(compact_file)
+
+                self.assertEqual(
+                    (game.width, game.height, game.rounds, game.you),
+                    (expected.width, expected.height, expected.rounds, expected.you),
+                )
+                for t in reversed(range(len(expected.data))):  # Backwards to test rebuilding from the start
+                    assert_array_equal(game.cell_states[t], expected.cell_states[t])
+                    self.assertListEqual(game.player_states[t], expected.player_states[t])
+                self.assertEqual(game.names, expected.names)
+
+                metadata = SavedGame.load_metadata(compact_file)
+                self.assertEqual(metadata, SavedGame.load_metadata(log_file))
+
+    def test_size(self):
+        compact_file = Path(self.tmp_dir.name) / "game.spedlog"
+        json_to_compact(log_files[0], compact_file)
+
+        self.assertLess(compact_file.stat().st_size * 10, log_files[0].stat().st_size)
+
+    def test_truncated(self):
+        """Truncated logs are read up to the last complete state."""
+        compact_file = Path(self.tmp_dir.name) / "game.spedlog"
+        json_to_compact(log_files[0], compact_file)
+        data = compact_file.read_bytes()
+        n_states = len(CompactLog(data))
+
+        truncated = CompactLog(data[:-10])
+        self.assertEqual(len(truncated), n_states - 1)
+        assert_array_equal(truncated[-1]["cells"], CompactLog(data)[n_states - 2]["cells"])
+
+    def test_recorder(self):
+        """Streamed recording matches converting the complete log."""
+        with open(log_files[0]) as f:
+            states = json.load(f)
+        expected_file = Path(self.tmp_dir.name) / "expected.spedlog"
+        json_to_compact(log_files[0], expected_file)
+
+        compact_file = Path(self.tmp_dir.name) / "game.spedlog"
+        with GameRecorder(compact_file) as recorder:
+            for state in states:
+                cells = np.array(state["cells"])
+                recorder.record({k: v for k, v in state.items() if k != "cells"}, cells)
+        self.assertEqual(compact_file.read_bytes(), expected_file.read_bytes())
+
+    def test_incomplete(self):
+        """Logs of games, which were not completed, are only loaded on request."""
+        with open(log_files[0]) as f:
+            states = json.load(f)
+        compact_file = Path(self.tmp_dir.name) / "game.spedlog"
+        with GameRecorder(compact_file) as recorder:
+            for state in states[:10]:
+                recorder.record(state)
+
+        with self.assertRaises(ValueError):
+            SavedGame.load(compact_file)
+        game = SavedGame.load(compact_file, allow_incomplete=True)
+        self.assertEqual(len(game.data), 10)
+
+
+class FailingPolicy(RandomPolicy):
+    def act(self, cells, player, opponents, rounds, deadline):
+        raise RuntimeError("Policy failed")
+
+
+class TestTournamentLogger(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.log_dir = Path(self.tmp_dir.name) / "logs"
+
+    def test_statistics(self):
+        """Statistics match the written log."""
+        logger = TournamentLogger(self.log_dir, write_logs=True, compact=True)
+        (key, rounds, winner, you, names, width, height), _ = play_game(
+            10, 12, [RandomPolicy(seed=0), RandomPolicy(seed=1)], logger=logger
+        )
+
+        game = SavedGame.load(self.log_dir / (key + ".spedlog"))
+        self.assertEqual((rounds, width, height), (game.rounds, game.width, game.height))
+        self.assertEqual(names, game.names)
+        self.assertEqual(winner, game.winner.name if game.winner is not None else None)
+
+    def test_without_logs(self):
+        """Nothing is written to disk, if logs are disabled."""
+        logger = TournamentLogger(self.log_dir, write_logs=False)
+        stats = play_game(10, 12, [RandomPolicy(seed=0), RandomPolicy(seed=1)], logger=logger)
+
+        self.assertIsNotNone(stats)
+        self.assertListEqual(list(self.log_dir.iterdir()), [])
+
+    def test_aborted(self):
+        """Logs of aborted games are discarded."""
+        logger = TournamentLogger(self.log_dir, write_logs=True)
+        with self.assertLogs(level="ERROR"):
+            stats = play_game(20, 20, [FailingPolicy(seed=0), FailingPolicy(seed=1)], logger=logger)
+
+        self.assertIsNone(stats)
+        self.assertListEqual(list(self.log_dir.iterdir()), [])
@@ -154,6 +154,11 @@ class TestOpponentDistanceHeuristic(unittest.TestCase):
         score = heuristics.OpponentDistanceHeuristic(dist_threshold=16).score(*default_almost_full_board())
         self.assertEqual(score, 4.0 / 10.0)
 
+    def test_speed_aware(self):
+        heuristic = heuristics.OpponentDistanceHeuristic(dist_threshold=16, speed_aware=True)
+        self.assertEqual(heuristic.score(*default_round1_board()), 2.0 / 10.0)
+        self.assertEqual(heuristic.score(*default_almost_full_board()), 16.0 / 10.0)  # Players can not meet
+
     def test_immutable_input(self):
         """Check if the heuristic modifies the input data itself."""
         board_state = default_round1_board()
@@ -175,6 +180,12 @@ class TestVoronoiHeuristic(unittest.TestCase):
         score = heuristics.VoronoiHeuristic(max_steps=16, opening_iterations=0).score(*default_almost_full_board())
         self.assertEqual(score, 3.0 / 25.0)
 
+    def test_speed_aware(self):
+        heuristic = heuristics.VoronoiHeuristic(max_steps=16, speed_aware=True)
+        self.assertEqual(heuristic.score(*empty_board_1player()), 1.0)
+        self.assertEqual(heuristic.score(*default_round1_board()), 10.0 / 25.0)
+        self.assertEqual(heuristic.score(*default_almost_full_board()), 3.0 / 25.0)
+
     def test_immutable_input(self):
         """Check if the heuristic modifies the input data itself."""
         board_state = default_round1_board()
@@ -271,6 +282,20 @@ class TestPathLengthHeuristic(unittest.TestCase):
         score = heuristics.PathLengthHeuristic(n_steps=5).score(*default_almost_full_board())
         self.assertEqual(score, 2.0 / 5.0)
 
+    def test_transposition_table(self):
+        """Remembered search results must not change the score."""
+        for n_steps in range(1, 12):
+            with self.subTest(n_steps=n_steps):
+                heuristic = heuristics.PathLengthHeuristic(n_steps=n_steps)
+                reference = heuristics.PathLengthHeuristic(n_steps=n_steps, transposition_table_size=0)
+
+                for board_state in (default_round1_board(), default_almost_full_board()):
+                    score = reference.score(*board_state)
+                    self.assertEqual(heuristic.score(*board_state), score)
+                    self.assertEqual(heuristic.score(*board_state), score)  # Second call uses the table
+
+                self.assertGreater(heuristic.transposition_table.hits, 0)
+
     def test_immutable_input(self):
         """Check if the heuristic modifies the input data itself."""
         board_state = default_round1_board()
@@ -1,8 +1,49 @@
+import multiprocessing as mp
+import pickle
+import threading
+import time
 import unittest
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
 
 import policies
-from environments import SimulatedSpe_edEnv
-from heuristics import CompositeHeuristic, RandomHeuristic
+from environments import SimulatedSpe_edEnv, spe_ed
+from environments.spe_ed import SavedGame
+from heuristics import CompositeHeuristic, RandomHeuristic, RegionHeuristic
+from policies.deadline import Deadline
+
+
+class WaitingPolicy(policies.RandomPolicy):
+    """Policy, which always uses its whole time and counts its calls."""
+
+    def __init__(self):
+        super().__init__(seed=0)
+        self.calls = 0
+
+    def act(self, cells, player, opponents, rounds, deadline):
+        self.calls += 1
+        while time.time() < deadline:
+            time.sleep(0.001)
+        return "turn_left"
+
+
+class WaitingHeuristic(RandomHeuristic):
+    """Heuristic, which always uses its whole time."""
+
+    def score(self, cells, player, opponents, rounds, deadline):
+        while time.time() < deadline:
+            time.sleep(0.001)
+        return 0.5
+
+
+class StuckHeuristic(RandomHeuristic):
+    """Heuristic, which ignores the deadline in worker processes."""
+
+    def score(self, cells, player, opponents, rounds, deadline):
+        if mp.current_process().name != "MainProcess":
+            time.sleep(60)
+        return 0.5
 
 
 def run_policy(env, pol):
@@ -114,6 +155,154 @@ class TestHeuristicPolicy(unittest.TestCase):
         )
         run_policy(env, pol)
 
+    def test_parallel(self):
+        """Parallel evaluation selects the same actions as sequential evaluation."""
+        saved_game = SavedGame.load(r"tests/logs/20201019-182018.json")
+        pol = policies.HeuristicPolicy(heuristic=RegionHeuristic(), occupancy_map_depth=2)
+        with policies.HeuristicPolicy(RegionHeuristic(), occupancy_map_depth=2, n_workers=2) as parallel_pol:
+            for t in range(0, saved_game.rounds, 10):
+                obs = (*saved_game.get_obs(t, saved_game.you), time.time() + 10)
+                self.assertEqual(parallel_pol.act(*obs), pol.act(*obs), f"t={t}")
+
+    def test_pickle_parallel(self):
+        """Worker pool is not pickled."""
+        with policies.HeuristicPolicy(heuristic=RandomHeuristic(), n_workers=1) as pol:
+            self.assertIsNone(pickle.loads(pickle.dumps(pol))._pool)
+
+    def test_cancel_parallel(self):
+        """Cancelling the deadline stops the workers."""
+        saved_game = SavedGame.load(r"tests/logs/20201019-182018.json")
+        with policies.HeuristicPolicy(heuristic=WaitingHeuristic(), n_workers=2) as pol:
+            deadline = Deadline(time.time() + 60)
+            timer = threading.Timer(0.1, deadline.cancel)
+            timer.start()
+            start = time.time()
+            pol.act(*saved_game.get_obs(0, saved_game.you), deadline)
+            self.assertLess(time.time() - start, 30)
+            timer.join()
+
+            # Next turns are not cancelled
+            deadline = time.time() + 0.2
+            pol.act(*saved_game.get_obs(1, saved_game.you), deadline)
+            self.assertGreaterEqual(time.time(), deadline)
+
+    def test_stuck_parallel(self):
+        """Actions of stuck workers are evaluated sequentially after the deadline and the pool is restarted."""
+        saved_game = SavedGame.load(r"tests/logs/20201019-182018.json")
+        with policies.HeuristicPolicy(heuristic=StuckHeuristic(), n_workers=2) as pol:
+            deadline = time.time() + 0.1
+            with self.assertLogs(level="WARNING"):
+                action = pol.act(*saved_game.get_obs(0, saved_game.you), deadline)
+            self.assertLess(time.time(), deadline + 1)
+            self.assertIn(action, spe_ed.actions)
+            self.assertIsNone(pol._pool)
+
+    def test_finalize_parallel(self):
+        """Worker pool and shared memory are released, when the policy is garbage collected."""
+        pol = policies.HeuristicPolicy(heuristic=RandomHeuristic(), n_workers=1)
+        name = pol._boards.shm.name
+        del pol
+        with self.assertRaises(FileNotFoundError):
+            SharedMemory(name=name)
+
+
+class TestActionSearchPolicy(unittest.TestCase):
+    def test_execution(self):
+        """Executing the policy should not throw any error."""
+        env = SimulatedSpe_edEnv(5, 5, [policies.RandomPolicy() for _ in range(5)])
+        pol = policies.ActionSearchPolicy(RandomHeuristic(), depth_limit=3, occupancy_map_depth=2)
+        run_policy(env, pol)
+
+    def test_iterative_deepening_execution(self):
+        """Executing the policy should not throw any error."""
+        env = SimulatedSpe_edEnv(5, 5, [policies.RandomPolicy() for _ in range(5)])
+        pol = policies.ActionSearchPolicy(
+            RandomHeuristic(), depth_limit=3, occupancy_map_depth=2, iterative_deepening=True
+        )
+        run_policy(env, pol)
+
+    def test_iterative_deepening_deadline(self):
+        """Deadline is not overshot, even without depth limit."""
+        env = SimulatedSpe_edEnv(20, 20, [policies.RandomPolicy()], seed=0)
+        cells, player, opponents, rounds, _ = env.reset()
+        pol = policies.ActionSearchPolicy(
+            RandomHeuristic(), depth_limit=100, expanded_node_limit=10**6, iterative_deepening=True
+        )
+
+        deadline = time.time() + 0.2
+        action = pol.act(cells, player, opponents, rounds, deadline)
+
+        self.assertLess(time.time(), deadline + 0.05)
+        self.assertIn(action, spe_ed.actions)
+
+    def test_iterative_deepening_slow_heuristic(self):
+        """Evaluations are bounded by the deadline, which may pass during the first depth."""
+        cells = np.zeros((5, 5), dtype=bool)
+        player = spe_ed.Player(1, 4, 2, spe_ed.directions_by_name["right"], 1, True)
+        pol = policies.ActionSearchPolicy(WaitingHeuristic(), iterative_deepening=True)
+
+        deadline = time.time() + 0.1
+        action = pol.act(cells, player, [], 1, deadline)
+
+        self.assertLess(time.time(), deadline + 0.05)
+        self.assertEqual(action, "turn_left")  # Only evaluated action, `change_nothing` leaves the bounds
+
+
+class TestPonderingPolicy(unittest.TestCase):
+    def test_execution(self):
+        """Executing the policy should not throw any error."""
+        env = SimulatedSpe_edEnv(5, 5, [policies.RandomPolicy() for _ in range(5)])
+        pol = policies.PonderingPolicy(policies.RandomPolicy(), ponder_time_limit=0.1)
+
+        obs = env.reset()
+        done = False
+        while not done:
+            action = pol.act(*obs)
+            pol.ponder(*obs[:4], action)
+            obs, _, done, _ = env.step(action)
+        pol.stop()
+
+    def test_predicted_state(self):
+        """Pondered action is returned, if the predicted state occurs."""
+        env = SimulatedSpe_edEnv(20, 20, [policies.ScriptedPolicy([])], seed=0)
+        waiting_policy = WaitingPolicy()
+        pol = policies.PonderingPolicy(waiting_policy, ponder_time_limit=60)
+
+        obs = env.reset()
+        pol.ponder(*obs[:4], "change_nothing")
+        obs, _, _, _ = env.step("change_nothing")
+        action = pol.act(*obs[:4], time.time() + 0.05)  # Pondering is still running and needs to be cancelled
+
+        self.assertEqual(pol.hits, 1)
+        self.assertEqual(action, "turn_left")
+        self.assertEqual(waiting_policy.calls, 1)
+
+    def test_unpredicted_state(self):
+        """Wrapped policy is asked, if another state occurs."""
+        env = SimulatedSpe_edEnv(20, 20, [policies.ScriptedPolicy([])], seed=0)
+        waiting_policy = WaitingPolicy()
+        pol = policies.PonderingPolicy(waiting_policy, ponder_time_limit=60)
+
+        obs = env.reset()
+        pol.ponder(*obs[:4], "change_nothing")
+        obs, _, _, _ = env.step("speed_up")
+        pol.act(*obs[:4], time.time() + 0.05)
+
+        self.assertEqual(pol.hits, 0)
+        self.assertEqual(waiting_policy.calls, 2)
+
+    def test_deadline(self):
+        """Cancelled deadlines have passed."""
+        deadline = Deadline(time.time() + 10)
+        self.assertTrue(time.time() < deadline)
+        self.assertGreater(deadline - time.time(), 0)
+
+        deadline.cancel()
+        self.assertFalse(time.time() < deadline)
+        self.assertTrue(time.time() > deadline)
+        self.assertLess(deadline - time.time(), 0)
+        self.assertIs(min(time.time() + 1, deadline), deadline)
+
 
 class TestNamedPolicies(unittest.TestCase):
     def test_loading(self):
@@ -0,0 +1,75 @@
+import multiprocessing as mp
+import pickle
+import unittest
+
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from environments import shared_board
+from environments.shared_board import SharedBoardPool
+from environments.spe_ed import Cells, SavedGame
+
+
+def _sum_board(board):
+    return int(np.sum(board.cells()))
+
+
+class TestSharedBoardPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = SharedBoardPool(2)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_roundtrip(self):
+        """Boards are returned unchanged as read-only `Cells`."""
+        game = SavedGame.load(r"tests/logs/20201019-182018.json")
+        for cells in [game.cell_states[-1], game.cell_states[-1] != 0]:
+            with self.subTest(dtype=cells.dtype):
+                board = self.pool.put(cells)
+                view = board.cells()
+
+                self.assertIsInstance(view, Cells)
+                self.assertEqual(view.dtype == bool, cells.dtype == bool)
+                assert_array_equal(view, cells)
+                self.assertFalse(view.flags.writeable)
+                self.pool.release(board)
+
+    def test_handle_size(self):
+        """Handles are small, independent of the board size."""
+        board = self.pool.put(np.ones((80, 80), dtype=bool))
+
+        self.assertLess(len(pickle.dumps(board)), 200)
+
+    def test_slots(self):
+        """Boards in different slots do not interfere."""
+        board1 = self.pool.put(np.ones((10, 20), dtype=np.int8))
+        board2 = self.pool.put(np.zeros((20, 10), dtype=np.int8))
+        with self.assertRaises(RuntimeError):  # All slots are used
+            self.pool.put(np.zeros((20, 10), dtype=np.int8))
+
+        assert_array_equal(board1.cells(), 1)
+        assert_array_equal(board2.cells(), 0)
+
+        self.pool.release(board2)
+        board3 = self.pool.put(np.full((5, 5), 2, dtype=np.int8))
+        assert_array_equal(board1.cells(), 1)
+        assert_array_equal(board3.cells(), 2)
+
+    def test_worker(self):
+        """Workers can read boards from the handle."""
+        board = self.pool.put(np.ones((40, 40), dtype=np.int8))
+
+        with mp.Pool(2) as pool:
+            self.assertListEqual(pool.map(_sum_board, [board] * 4), [1600] * 4)
+
+    def test_detach(self):
+        """Attached blocks are closed and attached again on the next access."""
+        board = self.pool.put(np.ones((10, 10), dtype=np.int8))
+        self.assertEqual(_sum_board(board), 100)
+        self.assertIn(board.name, shared_board._attached)
+
+        shared_board.detach()
+        self.assertDictEqual(shared_board._attached, {})
+        self.assertEqual(_sum_board(board), 100)
+        shared_board.detach()
@@ -4,8 +4,10 @@ from pathlib import Path
 import numpy as np
 from numpy.testing import assert_array_equal
 
-from environments import SimulatedSpe_edEnv, Spe_edSimulator
-from environments.spe_ed import Player, SavedGame, directions
+from environments import BitboardSimulator, PlayerBatch, SimulatedSpe_edEnv, Spe_edSimulator, zobrist
+from environments.batch import simulate_batch
+from environments.spe_ed import Player, SavedGame, actions, directions
+from policies import RandomPolicy
 
 
 class TestSimulatorEnv(unittest.TestCase):
@@ -129,6 +131,46 @@ class TestSimulatorEnv(unittest.TestCase):
                     del game.data[t]["deadline"]  # Simulation doesn't have deadlines
                 self.assertDictEqual(env.game_state(), game.data[t])
 
+    def test_zobrist(self):
+        """Incrementally updated hash has to match the hash computed from scratch."""
+        env = SimulatedSpe_edEnv(20, 20, [RandomPolicy(seed=0)], seed=0)
+        env.reset()
+        self.assertIsNotNone(env.zobrist)  # Compute initial hash
+
+        done = False
+        while not done:
+            _, _, done, _ = env.step("change_nothing")
+            self.assertEqual(env.board_hash, zobrist.board_hash(env.cells))
+
+    def test_occupancy(self):
+        """Observations share one padded buffer, which is updated in place."""
+        env = SimulatedSpe_edEnv(20, 20, [RandomPolicy(seed=0)], seed=0)
+        cells = env.reset()[0]
+
+        previous = cells.copy()
+        done = False
+        while not done:
+            obs, _, done, _ = env.step("change_nothing")
+            self.assertIs(obs[0].buffer, cells.buffer)
+            assert_array_equal(cells, obs[0])  # Previous observations change with each step
+            self.assertTrue(np.any(cells != previous))
+            previous = cells.copy()
+            self.assertFalse(obs[0].flags.writeable)
+            assert_array_equal(obs[0], env.cells != 0)
+            self.assertTrue(np.all(obs[0].buffer[:2]))  # Border is kept
+
+    def test_set_cells(self):
+        """Buffers are reused for boards of the same size."""
+        env = SimulatedSpe_edEnv(3, 2, [])
+        occupancy = env.occupancy
+        env.set_cells([[0, 1, 0], [-1, 0, 2]])
+        self.assertIs(env.occupancy, occupancy)
+        assert_array_equal(env.occupancy, [[False, True, False], [True, False, True]])
+
+        env.set_cells(np.zeros((4, 5)))
+        self.assertEqual((env.width, env.height), (5, 4))
+        self.assertFalse(np.any(env.occupancy))
+
 
 class TestSimulator(unittest.TestCase):
     def test_step_change_nothing(self):
@@ -220,3 +262,143 @@ class TestSimulator(unittest.TestCase):
                     self.assertListEqual(sim.players, saved_game.player_states[t + 1], f"t={t}")
                     # Compare rounds
                     self.assertEqual(sim.rounds, t + 2, f"t={t}")
+
+    def test_apply_revert(self):
+        """In place steps have to match immutable steps and restore the state on revert."""
+        saved_game = SavedGame.load(r"tests/logs/20201101-141529.json")
+        sim = saved_game.create_simulator(0)
+        live_sim = Spe_edSimulator(sim.cells.copy(), [p.copy() for p in sim.players], sim.rounds)
+
+        for t in range(saved_game.rounds):
+            actions = saved_game.infer_actions(t)
+            sim = sim.step(actions)
+            live_sim.apply(actions)
+
+            assert_array_equal(live_sim.cells, sim.cells, f"t={t}")
+            self.assertListEqual(live_sim.players, sim.players, f"t={t}")
+            self.assertEqual(live_sim.rounds, sim.rounds, f"t={t}")
+
+        for t in reversed(range(saved_game.rounds)):
+            live_sim.revert()
+            sim = sim.undo()
+
+            assert_array_equal(live_sim.cells, sim.cells, f"t={t}")
+            self.assertListEqual(live_sim.players, sim.players, f"t={t}")
+            self.assertEqual(live_sim.rounds, sim.rounds, f"t={t}")
+
+    def test_zobrist(self):
+        """Incrementally updated hash has to match the hash computed from scratch."""
+        saved_game = SavedGame.load(r"tests/logs/20201101-141529.json")
+        sim = saved_game.create_simulator(0)
+        live_sim = Spe_edSimulator(sim.cells.copy(), [p.copy() for p in sim.players], sim.rounds)
+        hashes = [sim.zobrist]
+        self.assertEqual(live_sim.zobrist, hashes[0])
+
+        for t in range(saved_game.rounds):
+            actions = saved_game.infer_actions(t)
+            sim = sim.step(actions)
+            live_sim.apply(actions)
+
+            expected = zobrist.state_hash(zobrist.board_hash(sim.cells), sim.players, sim.rounds)
+            self.assertEqual(sim.zobrist, expected, f"t={t}")
+            self.assertEqual(live_sim.zobrist, expected, f"t={t}")
+            hashes.append(expected)
+
+        for t in reversed(range(saved_game.rounds)):
+            live_sim.revert()
+            self.assertEqual(live_sim.zobrist, hashes[t], f"t={t}")
+
+
+class TestBitboardSimulator(unittest.TestCase):
+    def test_step_change_nothing(self):
+        cells = np.zeros((5, 5), dtype=np.int32)
+        cells[2, 2] = 1
+        sim = BitboardSimulator(cells, [Player(1, 2, 2, directions[0], 1, True)], rounds=1)
+
+        sim = sim.step(["change_nothing"])
+
+        assert_array_equal(
+            sim.cells,
+            [
+                [0, 0, 0, 0, 0],
+                [0, 0, 0, 0, 0],
+                [0, 0, 1, 1, 0],
+                [0, 0, 0, 0, 0],
+                [0, 0, 0, 0, 0],
+            ],
+        )
+        self.assertEqual(list(sim.changed), [(3, 2)])
+        self.assertTrue(sim.player.active)
+        assert_array_equal(cells[2], [0, 0, 1, 0, 0])  # Input is not modified
+
+    def test_equivalence(self):
+        """Bitboard engine has to produce the exact same states as the reference engine."""
+        for log_file in [
+            r"tests/logs/20201019-182018.json",  # Initial log
+            r"tests/logs/20201030-180428.json",  # Disconnect
+            r"tests/logs/20201101-141529.json",  # Jumping outside the map
+        ]:
+            with self.subTest(msg=Path(log_file).name):
+                saved_game = SavedGame.load(log_file)
+                sim = saved_game.create_simulator(0)
+                bitboard_sim = BitboardSimulator(sim.cells, [p.copy() for p in sim.players], sim.rounds)
+
+                for t in range(saved_game.rounds):
+                    actions = saved_game.infer_actions(t)
+                    sim = sim.step(actions)
+                    bitboard_sim = bitboard_sim.step(actions)
+
+                    assert_array_equal(bitboard_sim.cells, sim.cells, f"t={t}")
+                    self.assertListEqual(bitboard_sim.players, sim.players, f"t={t}")
+                    self.assertEqual(bitboard_sim.rounds, sim.rounds, f"t={t}")
+                    self.assertSetEqual(set(bitboard_sim.changed), {(int(x), int(y)) for x, y in sim.changed})
+
+    def test_zobrist(self):
+        """Incrementally updated hash has to match the hash computed from scratch."""
+        saved_game = SavedGame.load(r"tests/logs/20201101-141529.json")
+        sim = saved_game.create_simulator(0)
+        sim = BitboardSimulator(sim.cells, sim.players, sim.rounds)
+
+        hashes = set()
+        for t in range(saved_game.rounds):
+            sim = sim.step(saved_game.infer_actions(t))
+
+            self.assertEqual(sim.zobrist, zobrist.state_hash(zobrist.board_hash(sim.cells), sim.players, sim.rounds))
+            hashes.add(sim.zobrist)
+        self.assertEqual(len(hashes), saved_game.rounds)  # All states are distinct
+
+
+class TestSimulateBatch(unittest.TestCase):
+    def test_equivalence(self):
+        """Each branch has to match the reference engine, all actions are evaluated in one call per round."""
+        saved_game = SavedGame.load(r"tests/logs/20201101-141529.json")
+
+        for t in range(saved_game.rounds):
+            sim = saved_game.create_simulator(t)
+            states = PlayerBatch.from_players(sim.players).repeat(len(actions))
+            action_indices = np.tile(np.arange(len(actions)), len(sim.players))
+
+            new_states, path = simulate_batch(sim.cells, states, action_indices, sim.rounds)
+
+            players = [p for p in sim.players for _ in actions]
+            for i, (player, action) in enumerate(zip(players, action_indices)):
+                sub_sim = Spe_edSimulator(sim.cells.copy(), [player.copy()], sim.rounds).step([actions[action]])
+                expected = sub_sim.player.copy()
+                expected.player_id = 1
+                self.assertEqual(new_states.player(i), expected, f"t={t}, {player}, {actions[action]}")
+                # All newly occupied cells are part of the path
+                changed = {y * sim.cells.shape[1] + x for x, y in sub_sim.changed}
+                self.assertLessEqual(changed, set(path[i][path[i] >= 0]), f"t={t}, {player}, {actions[action]}")
+
+    def test_history(self):
+        """Cells occupied in previous steps of a branch are collisions."""
+        cells = np.zeros((5, 5), dtype=np.int32)
+        states = PlayerBatch.from_players([Player(1, 0, 2, directions[0], 1, True)] * 2)
+        occupied = np.array([[2 * 5 + 1], [-1]])
+
+        new_states, path = simulate_batch(cells, states, [4, 4], 1, occupied)
+
+        assert_array_equal(new_states.active, [False, True])
+        assert_array_equal(new_states.x, [1, 1])
+        assert_array_equal(path[:, 0], [2 * 5 + 1, 2 * 5 + 1])
+        assert_array_equal(path[:, 1:], -1)
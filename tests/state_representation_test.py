@@ -1,10 +1,14 @@
+import itertools
 import unittest
 
 import numpy as np
 from numpy.testing import assert_array_almost_equal, assert_array_equal
+from scipy import ndimage
 
-from environments.spe_ed import Player, SavedGame, directions_by_name
-from state_representation import occupancy_map, padded_window
+from environments.simulator import Spe_edSimulator, simulate
+from environments.spe_ed import Cells, Player, SavedGame, actions, directions_by_name
+from state_representation import analysis, arrival_times, geodesic_voronoi, occupancy_map, occupancy_maps, padded_window
+from state_representation.regions import RegionTracker
 
 
 class TestOccupancyMap(unittest.TestCase):
@@ -49,6 +53,14 @@ class TestOccupancyMap(unittest.TestCase):
             ],
         )
 
+    def test_depth_0(self):
+        """Depth 0 projects one step, like depth 1."""
+        cells = np.zeros((5, 5), dtype=np.int32)
+        cells[2, 2] = 1
+        opponents = [Player(1, 2, 2, directions_by_name["right"], 1, True)]
+
+        assert_array_equal(occupancy_map(cells, opponents, 1, depth=0), occupancy_map(cells, opponents, 1, depth=1))
+
     def test_depth_2(self):
         """Compute occupancy for two steps."""
         cells = np.zeros((5, 5), dtype=np.int32)
@@ -95,6 +107,57 @@ class TestOccupancyMap(unittest.TestCase):
             ],
         )
 
+    def test_reference(self):
+        """Batched expansion matches the recursive simulation of all action sequences."""
+        rng = np.random.default_rng(0)
+        for trial in range(12):
+            cells = (rng.random((9, 11)) < 0.2).astype(bool if trial % 2 else np.int32)
+            opponents = [
+                Player(2, 3, 4, directions_by_name["right"], 1, True),
+                Player(3, 8, 2, directions_by_name["down"], 3, True),
+            ]
+            for p in opponents:
+                cells[p.y, p.x] = p.player_id
+            rounds, death_discount = trial % 6 + 1, (1, 0.5, 0)[trial % 3]
+
+            # Reference implementation
+            expected = (cells != 0).astype(float)
+
+            def recursion(sim, probability=1, level=1):
+                probs = np.zeros(cells.shape)
+                for a in actions:
+                    sub_sim = sim.step([a])
+                    sub_probability = probability / len(actions) * (1 if sub_sim.player.active else death_discount)
+                    probs += (sim.cells != sub_sim.cells) * sub_probability
+                    if level < 3 and sub_sim.player.active:
+                        recursion(sub_sim, sub_probability, level + 1)
+                expected[:] = 1 - (1 - expected) * (1 - probs)
+
+            for p in opponents:
+                recursion(Spe_edSimulator(cells, [p], rounds))
+
+            occ = occupancy_map(cells, opponents, rounds, depth=3, death_discount=death_discount)
+            assert_array_almost_equal(occ, expected, decimal=6)
+
+    def test_all_levels(self):
+        """All levels of one traversal equal the maps of the respective depth, and are memoized."""
+        analysis.cache.clear()
+        cells = np.zeros((9, 11), dtype=np.int32)
+        opponents = [
+            Player(2, 3, 4, directions_by_name["right"], 2, True),
+            Player(3, 8, 2, directions_by_name["up"], 1, True),
+        ]
+        for p in opponents:
+            cells[p.y, p.x] = p.player_id
+
+        levels = occupancy_maps(cells, opponents, 6, depth=3)
+
+        self.assertEqual(len(levels), 3)
+        for d, occ in enumerate(levels, start=1):
+            assert_array_almost_equal(occ, occupancy_map(cells, opponents, 6, depth=d))
+        self.assertIs(occupancy_maps(cells.copy(), opponents, 6, depth=3), levels)
+        self.assertIsNot(occupancy_maps(cells, opponents, 7, depth=3), levels)
+
 
 class TestPaddedWindow(unittest.TestCase):
     def test_window(self):
@@ -137,3 +200,213 @@ class TestPaddedWindow(unittest.TestCase):
                 [-1, -1, -1, -1, -1],
             ],
         )
+
+    def test_padded_cells(self):
+        """Windows of padded cells are slices of the buffer and equal to padded copies."""
+        game = SavedGame.load(r"tests/logs/20201019-182018.json")
+        cells = Cells.padded(game.cell_states[23] != 0)
+        player = game.player_states[23][0]
+
+        window = padded_window(cells, player.x, player.y, 5, 1)
+        assert_array_equal(window, padded_window(np.asarray(cells), player.x, player.y, 5, 1))
+        self.assertIs(window.base, cells.buffer)
+
+
+class TestRegionTracker(unittest.TestCase):
+    def assertRegionsEqual(self, tracker, cells, players=()):
+        """Regions have to partition the free cells like `ndimage.label`."""
+        empty = cells == 0
+        for p in players:
+            empty[p.y, p.x] = True
+        labelled, n_regions = ndimage.label(empty)
+        tracked = tracker.labelled()
+
+        assert_array_equal(tracked != 0, empty)
+        self.assertEqual(tracker.n_regions, n_regions)
+        label_pairs = set(zip(labelled[empty].tolist(), tracked[empty].tolist()))
+        self.assertEqual(len(label_pairs), n_regions)  # Regions map one-to-one
+        sizes = np.bincount(labelled.ravel())
+        for label, tracked_label in label_pairs:
+            self.assertEqual(tracker.sizes[tracked_label], sizes[label])
+
+    def test_fill_restore(self):
+        """Filling cells splits regions, restoring reverts all changes."""
+        rng = np.random.default_rng(0)
+        cells = (rng.random((12, 15)) < 0.3).astype(np.int32)
+        tracker = RegionTracker(cells)
+        self.assertRegionsEqual(tracker, cells)
+
+        records, states = [], [cells.copy()]
+        for _ in range(40):
+            positions = [(rng.integers(15), rng.integers(12)) for _ in range(3)]
+            records.append(tracker.fill(positions))
+            for x, y in positions:
+                cells[y, x] = 1
+            states.append(cells.copy())
+            self.assertRegionsEqual(tracker, cells)
+
+        for record in reversed(records):
+            tracker.restore(record)
+            states.pop()
+            self.assertRegionsEqual(tracker, states[-1])
+
+    def test_simulator(self):
+        """Regions of the simulator are updated by steps, heads of active players are free."""
+        game = SavedGame.load(r"tests/logs/20201019-182018.json")
+        sim = game.create_simulator(0)
+        live_sim = game.create_simulator(0)
+        self.assertRegionsEqual(sim.regions, sim.cells, sim.players)  # Create trackers
+        self.assertRegionsEqual(live_sim.regions, live_sim.cells, live_sim.players)
+
+        for t in range(game.rounds):
+            actions = game.infer_actions(t)
+            sim = sim.step(actions)
+            live_sim.apply(actions)
+
+            active = [p for p in sim.players if p.active]
+            self.assertRegionsEqual(sim.regions, sim.cells, active)
+            self.assertRegionsEqual(live_sim.regions, live_sim.cells, active)
+
+        for t in reversed(range(game.rounds)):
+            live_sim.revert()
+            sim = sim.undo()
+            self.assertRegionsEqual(live_sim.regions, live_sim.cells, [p for p in sim.players if p.active])
+
+
+class TestAnalysis(unittest.TestCase):
+    def setUp(self):
+        analysis.cache.clear()
+
+    def test_label_regions(self):
+        """Labels match `ndimage.label`, equal boards share the entry."""
+        game = SavedGame.load(r"tests/logs/20201019-182018.json")
+        cells = game.cell_states[50] != 0
+        players = [p for p in game.player_states[50] if p.active]
+
+        labelled, sizes = analysis.label_regions(cells, players)
+
+        empty = cells == 0
+        for p in players:
+            empty[p.y, p.x] = True
+        expected, n_labels = ndimage.label(empty)
+        assert_array_equal(labelled, expected)
+        assert_array_equal(sizes, [np.sum(expected == label) for label in range(n_labels + 1)])
+        self.assertFalse(labelled.flags.writeable)
+
+        self.assertIs(analysis.label_regions(cells.copy(), players[::-1])[0], labelled)  # Cached
+        self.assertEqual(analysis.cache.hits, 1)
+        self.assertIsNot(analysis.label_regions(cells, players[:1])[0], labelled)  # Different players
+
+    def test_morphology(self):
+        """Results match `scipy.ndimage`, parameters are part of the key."""
+        cells = np.random.default_rng(0).random((20, 20)) < 0.4
+
+        closed = analysis.morphology(cells, "binary_closing", 1, border_value=1)
+        assert_array_equal(closed, ndimage.binary_closing(cells, iterations=1, border_value=1))
+        self.assertIs(analysis.morphology(cells, "binary_closing", 1, border_value=1), closed)
+        assert_array_equal(analysis.morphology(cells, "binary_closing", 1), ndimage.binary_closing(cells))
+
+    def test_bounded(self):
+        """Least recently used entries are evicted."""
+        cache = analysis.AnalysisCache(max_size=2)
+        cache.get("a", lambda: 1)
+        cache.get("b", lambda: 2)
+        cache.get("a", lambda: 1)
+        cache.get("c", lambda: 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get("a", lambda: None), 1)
+        self.assertIsNone(cache.get("b", lambda: None))
+
+
+class TestGeodesicVoronoi(unittest.TestCase):
+    def test_dilation_equivalence(self):
+        """Territories match the expansion by repeated binary dilation, including removed overlaps."""
+        game = SavedGame.load(r"tests/logs/20201019-182018.json")
+        for t in [0, 20, 50, 80]:
+            with self.subTest(t=t):
+                cells = game.cell_states[t] != 0
+                players = [p for p in game.player_states[t] if p.active]
+
+                territories, distances = geodesic_voronoi(cells, players, max_steps=40)
+
+                # Reference implementation
+                mask = cells == 0
+                expected = np.zeros((len(players), *cells.shape), dtype=bool)
+                for idx, p in enumerate(players):
+                    mask[p.y, p.x] = True
+                    expected[idx, p.y, p.x] = True
+                for _ in range(40):
+                    for i in range(len(expected)):
+                        expected[i] = ndimage.binary_dilation(expected[i], mask=mask)
+                    overlaps = np.sum(expected, axis=0) > 1
+                    mask[overlaps] = 0
+                    expected[:, overlaps] = 0
+
+                assert_array_equal(territories, expected)
+                assert_array_equal(distances >= 0, np.any(expected, axis=0))
+                for p in players:
+                    self.assertEqual(distances[p.y, p.x], 0)
+
+    def test_distances(self):
+        """Distances are the number of steps on free cells."""
+        cells = np.zeros((3, 5), dtype=bool)
+        cells[1, 1:4] = True
+        player = Player(1, 0, 1, directions_by_name["up"], 1, True)
+
+        territories, distances = geodesic_voronoi(cells, [player], max_steps=10)
+
+        assert_array_equal(distances, [[1, 2, 3, 4, 5], [0, -1, -1, -1, 6], [1, 2, 3, 4, 5]])
+        self.assertEqual(np.sum(territories), 12)
+
+
+class TestArrivalTimes(unittest.TestCase):
+    def setUp(self):
+        analysis.cache.clear()
+
+    def test_brute_force(self):
+        """Arrival times match the first round, in which simulated action sequences occupy a cell."""
+        rng = np.random.default_rng(0)
+        for rounds in (1, 4, 6):
+            for speed in (1, 2, 4):
+                with self.subTest(rounds=rounds, speed=speed):
+                    cells = rng.random((12, 14)) < 0.15
+                    player = Player(1, 6, 5, directions_by_name["right"], speed, True)
+                    cells[player.y, player.x] = True
+
+                    expected = np.full(cells.shape, -1)
+                    for sequence in itertools.product(actions, repeat=3):
+                        c, p = cells.copy(), player.copy()
+                        for t, action in enumerate(sequence, start=1):
+                            before = c != 0
+                            simulate(c, [p], rounds + t - 1, [action])
+                            if not p.active:
+                                break
+                            reached = (c != 0) & ~before & ((expected < 0) | (expected > t))
+                            expected[reached] = t
+                    expected[player.y, player.x] = 0
+
+                    assert_array_equal(arrival_times(cells, player, rounds, horizon=3), expected)
+
+    def test_jump(self):
+        """Players jump over obstacles in every sixth round."""
+        cells = np.zeros((1, 8), dtype=bool)
+        cells[0, 3] = True
+        player = Player(1, 0, 0, directions_by_name["right"], 4, True)
+
+        assert_array_equal(arrival_times(cells, player, 5, horizon=1), [[0, -1, -1, -1, -1, -1, -1, -1]])
+        assert_array_equal(arrival_times(cells, player, 6, horizon=1), [[0, 1, -1, -1, 1, 1, -1, -1]])
+
+    def test_inactive(self):
+        cells = np.zeros((4, 4), dtype=bool)
+        player = Player(1, 0, 0, directions_by_name["right"], 1, False)
+
+        assert_array_equal(arrival_times(cells, player, 1), np.full((4, 4), -1))
+
+    def test_deadline(self):
+        """Search stops after the first round at a passed deadline, such results are not memoized."""
+        cells = np.zeros((1, 8), dtype=bool)
+        player = Player(1, 0, 0, directions_by_name["right"], 1, True)
+
+        assert_array_equal(arrival_times(cells, player, 1, horizon=3, deadline=0), [[0, 1, 1, -1, -1, -1, -1, -1]])
+        assert_array_equal(arrival_times(cells, player, 1, horizon=3), [[0, 1, 1, 2, 2, 2, 3, 3]])
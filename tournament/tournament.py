@@ -8,64 +8,100 @@ from uuid import uuid4
 
 import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 from tqdm.auto import tqdm
 
+from environments import game_log
 from environments.simulator import SimulatedSpe_edEnv, simulate
-from environments.spe_ed import SavedGame
-
-
-def init_stats_lock(l):
-    """Helper to pass the lock to sub processes."""
-    global stats_lock
-    stats_lock = l
+from environments.spe_ed import GameMetadata, SavedGame
+from state_representation import analysis
 
 
 class TournamentLogger:
-    def __init__(self, log_dir, write_logs):
+    def __init__(self, log_dir, write_logs, compact=False):
         self.log_dir = Path(log_dir)
-        self.csv_file = self.log_dir.parent / "statistics.csv"
         self.log_dir.mkdir(parents=True, exist_ok=True)
         self.write_logs = write_logs
+        self.compact = compact  # Write logs in the compact format of `environments.game_log` instead of JSON
 
     def log(self, states, execution_times):
         """Handle the logging of a completed tournament game with a set of different policies.
 
         Args:
             states: List of game states in form of parsed json.
-            policy_ids: The used policy IDs
+            execution_times: Execution times of each policy
+        Returns:
+            Statistics of the game, which are written by the main process
         """
-        log_file = self.log_dir / f"{uuid4().hex}.json"
+        log_file = self.log_dir / (uuid4().hex + (game_log.suffix if self.compact else ".json"))
 
         # Write log files
-        if self.write_logs:
+        if self.write_logs and self.compact:
+            with open(log_file, "wb") as f:
+                game_log.write_states(f, states)
+        elif self.write_logs:
             with open(log_file, "w") as f:
                 json.dump(states, f, separators=(",", ":"))
 
-        # Append new statisics
-        game = SavedGame(states)
-        df_stats = pd.DataFrame(
-            [
-                (
-                    log_file.name[:-5],  # name of game
-                    game.rounds,
-                    game.winner.name if game.winner is not None else None,
-                    game.names[game.you - 1] if game.you is not None else None,  # rounds  # winner  # you
-                    game.names,  # names
-                    game.width,
-                    game.height,
-                )
-            ],
-            columns=["uuid", "rounds", "winner", "you", "names", "width", "height"],
-        )
-        times_file = self.csv_file.parent / "times.csv"
-        df_times = pd.DataFrame(
-            [(pol, t) for pol, times in execution_times.items() for t in times], columns=["policy", "time"]
-        )
+        return self._statistics(log_file, SavedGame(states), execution_times)
+
+    def recorder(self):
+        """Create a recorder, which streams the states of a running game into the log directory.
+
+        Returns `None` if logs are not written, as statistics only need the final state.
+        """
+        if not self.write_logs:
+            return None
+        return game_log.GameRecorder(self.log_dir / (uuid4().hex + game_log.suffix))
+
+    def finish(self, recorder, game, execution_times):
+        """Handle the logging of a completed tournament game.
+
+        Args:
+            recorder: Recorder from `recorder()`
+            game: `GameMetadata` of the completed game
+            execution_times: Execution times of each policy
+        Returns:
+            Statistics of the game, which are written by the main process
+        """
+        if recorder is None:
+            return self._statistics(Path(uuid4().hex), game, execution_times)
+
+        recorder.close()
+        log_file = Path(recorder.file_name)
+        if not self.compact:  # Convert into JSON
+            json_file = log_file.with_suffix(".json")
+            game_log.compact_to_json(log_file, json_file)
+            log_file.unlink()
+
+        return self._statistics(log_file, game, execution_times)
 
-        with stats_lock:  # Ensure only one process is writing
-            df_stats.to_csv(self.csv_file, mode="a", header=not self.csv_file.exists(), index=False)
-            df_times.to_csv(times_file, mode="a", header=not times_file.exists(), index=False)
+    def abort(self, recorder):
+        """Discard the log of a game, which was not completed."""
+        if recorder is not None:
+            recorder.close()
+            Path(recorder.file_name).unlink(missing_ok=True)
+
+    def _statistics(self, log_file, game, execution_times):
+        """Summarize a game for the statistics store.
+
+        Args:
+            log_file: Log file of the game, its name identifies the game
+            game: `SavedGame` or `GameMetadata` of the game
+            execution_times: Execution times of each policy
+        Returns:
+            Row of the game and rows of the execution times, see `StatisticsStore.add_games` and `add_times`
+        """
+        game_row = (
+            log_file.stem,  # name of game
+            game.rounds,
+            game.winner.name if game.winner is not None else None,
+            game.names[game.you - 1] if game.you is not None else None,
+            game.names,
+            game.width,
+            game.height,
+        )
+        times = [(pol, t) for pol, pol_times in execution_times.items() for t in pol_times]
+        return game_row, times
 
 
 class TournamentEnv(SimulatedSpe_edEnv):
@@ -84,6 +120,7 @@ class TournamentEnv(SimulatedSpe_edEnv):
 
     def step(self):
         """Perform one game step."""
+        analysis.cache.clear()  # Boards of previous turns are not needed anymore
         actions = []
         for player in self.players:  # Compute actions of players
             if player.active:
@@ -97,7 +134,9 @@ class TournamentEnv(SimulatedSpe_edEnv):
                 actions.append("change_nothing")
 
         # Perform simulation step
-        _, _, self.rounds, _ = simulate(self.cells, self.players, self.rounds, actions)
+        _, _, self.rounds, changed = simulate(self.cells, self.players, self.rounds, actions)
+        self.update_board_hash(changed)
+        self.update_occupancy(changed)
         self.deadline = time.time() + self.time_limit
 
         done = sum(1 for p in self.players if p.active) < 2
@@ -106,28 +145,30 @@ class TournamentEnv(SimulatedSpe_edEnv):
                 p.name = str(self.policies[p.player_id - 1])
         return done
 
-    def game_state(self):
+    def game_state(self, include_cells=True):
         """Get current game state as dict."""
-        return {
-            "width": self.width,
-            "height": self.height,
-            "cells": self.cells.tolist(),
-            "players": dict(p.to_dict() for p in self.players),
-            "you": None,
-            "running": sum(1 for p in self.players if p.active) > 1,
-        }
+        state = SimulatedSpe_edEnv.game_state(self, include_cells)
+        state["you"] = None
+        return state
 
 
 def play_game(width, height, policies, show=False, logger=None):
-    """Simulate a single game with the given environment and policies."""
+    """Simulate a single game with the given environment and policies.
+
+    Returns:
+        Statistics of the game from the logger, `None` if there is no logger or the game failed
+    """
+    stats, recorder = None, None
     try:
         env = TournamentEnv(width, height, policies)
         env.reset()
 
         if show and not env.render(screen_width=720, screen_height=720):
             return
-        if logger is not None:  # Log initial state
-            states = [env.game_state()]
+        if logger is not None:
+            recorder = logger.recorder()
+        if recorder is not None:  # Log initial state
+            recorder.record(env.game_state(include_cells=False), env.cells)
 
         done = False
         while not done:
@@ -135,22 +176,40 @@ def play_game(width, height, policies, show=False, logger=None):
 
             if show and not env.render(screen_width=720, screen_height=720):
                 return
-            if logger is not None:
-                states.append(env.game_state())
+            if recorder is not None:
+                recorder.record(env.game_state(include_cells=False), env.cells)
 
         if logger is not None:  # log states together with a mapping of player_id to policy
-            logger.log(states, env.execution_times)
+            game = GameMetadata(
+                rounds=env.rounds - 1,
+                width=env.width,
+                height=env.height,
+                you=None,
+                players=[p.copy() for p in env.players],
+            )
+            stats = logger.finish(recorder, game, env.execution_times)
         if show:  # Show final state
-            while True:
-                if not env.render(screen_width=720, screen_height=720):
-                    return
+            while env.render(screen_width=720, screen_height=720):
                 plt.pause(0.01)  # Sleep
     except Exception:
         logging.exception("Error during simulation")
+    finally:
+        if logger is not None and stats is None:  # Discard the log of an aborted game
+            logger.abort(recorder)
+    return stats
+
 
+def _play_game(args):
+    """Unpack the arguments of `play_game` for `Pool.imap_unordered`."""
+    return play_game(*args)
 
-def run_tournament(show, log_dir, tournament_config_file, cores=None):
-    """Run a sequence of games in different combinations of given policies and log their results."""
+
+def run_tournament(show, log_dir, tournament_config_file, cores=None, batch_size=100):
+    """Run a sequence of games in different combinations of given policies and log their results.
+
+    Statistics are collected from the workers and written by this process in batches of `batch_size` games into
+    `statistics.sqlite` next to `log_dir`.
+    """
     # load config file
     config = SourceFileLoader("tournament_config", tournament_config_file).load_module()
     if len(config.policies) < 6:
@@ -158,21 +217,41 @@ def run_tournament(show, log_dir, tournament_config_file, cores=None):
 
     # Create logger
     if log_dir is not None:
+        from statistics.store import open_statistics
+
         directory = Path(log_dir)
         directory.mkdir(parents=True, exist_ok=True)
-        logger = TournamentLogger(log_dir, config.write_logs)
+        logger = TournamentLogger(log_dir, config.write_logs, getattr(config, "compact_logs", False))
+        store = open_statistics(directory.parent / "statistics.sqlite", key_column="uuid")
     else:
         logger = None
 
-    with mp.Pool(
-        cores, initializer=init_stats_lock, initargs=(mp.Lock(),)  # Pass the stats lock to all spawned subprocesses
-    ) as pool, tqdm(desc="Simulating games", total=config.n_games) as pbar:
+    def games():
         for _ in range(config.n_games):
             n_players = np.random.choice(5, p=config.n_players_distribution) + 2
             width = np.random.randint(config.min_size, config.max_size + 1)
             height = np.random.randint(config.min_size, config.max_size + 1)
             constellation = np.random.choice(config.policies, size=n_players, replace=False)
+            yield width, height, constellation, show, logger
+
+    game_rows, times = [], []
+
+    def write_statistics():
+        store.add_games(game_rows)
+        store.add_times(times)
+        game_rows.clear()
+        times.clear()
+
+    with mp.Pool(cores) as pool, tqdm(desc="Simulating games", total=config.n_games) as pbar:
+        for stats in pool.imap_unordered(_play_game, games()):
+            pbar.update()
+            if stats is None:
+                continue
+            game_rows.append(stats[0])
+            times.extend(stats[1])
+            if len(game_rows) >= batch_size:
+                write_statistics()
 
-            pool.apply_async(play_game, (width, height, constellation, show, logger), callback=lambda _: pbar.update())
-        pool.close()
-        pool.join()
+    if logger is not None:
+        write_statistics()
+        store.close()
@@ -15,3 +15,4 @@ n_players_distribution = [0.14, 0.2, 0.22, 0.22, 0.22]  # Estimated server distr
 n_games = 500
 
 write_logs = False
+compact_logs = False  # Write logs in the compact binary format